@@ -5,81 +5,662 @@ Automatiza a análise de repositórios GitHub usando múltiplos crews especializ
 """
 
 import os
+import bisect
+import functools
+import gzip
 import json
 import tempfile
 import zipfile
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import shutil
 import hashlib
 import secrets
+import sqlite3
+import subprocess
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Dict, Any, Optional
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from urllib.parse import urlparse
 
+import orjson
+
 # Imports do CrewAI
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
 from typing import Type
 from crewai import Crew, Agent, LLM, Task
 
+# Tamanho do buffer usado ao copiar dados para o disco (1 MiB)
+COPY_BUFFER_SIZE = 1 << 20
+
+# Sessão HTTP compartilhada para reaproveitar conexões (keep-alive) entre downloads,
+# com novas tentativas em falhas transitórias do servidor
+HTTP_RETRY = Retry(
+    total=3,
+    backoff_factor=0.5,
+    status_forcelist=(502, 503, 504),
+    allowed_methods=frozenset(['GET'])
+)
+HTTP_SESSION = requests.Session()
+HTTP_SESSION.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=HTTP_RETRY))
+HTTP_SESSION.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=HTTP_RETRY))
+HTTP_SESSION.headers['User-Agent'] = 'Analista-de-Qualidade'
+
+# Token opcional da API do GitHub (limite de 5000 requisições/hora em vez de 60)
+GITHUB_TOKEN = os.getenv('GITHUB_TOKEN')
+
+# Branch padrão já resolvido para cada repositório ("dono/repo" -> branch)
+DEFAULT_BRANCH_CACHE: Dict[str, str] = {}
+
+# Tempo máximo (segundos) para consultar o commit atual com `git ls-remote`
+GIT_LS_REMOTE_TIMEOUT = 10
+
+# Ordem fixa das ferramentas: o schema enviado ao LLM fica idêntico entre os crews
+TOOL_ORDER = ('file_reader', 'file_search', 'file_list')
+
+# Persona comum a todos os agentes. Com role/goal/backstory iguais, a mensagem de
+# sistema que o crewai monta ("You are {role}. {backstory}...") é idêntica entre os
+# crews, e o prefixo (schema das ferramentas + mensagem de sistema) pode ser
+# reaproveitado pelo cache de prompt do provedor. A especialidade de cada crew
+# vai no início da descrição da tarefa, depois desse prefixo.
+AGENT_ROLE = "analista_de_qualidade_de_codigo"
+AGENT_GOAL = "Analisar o repositório com as ferramentas disponíveis e responder com o JSON pedido na tarefa."
+AGENT_BACKSTORY = "Especialista em revisão de código e qualidade de software."
+
+# Parte dinâmica das tarefas; fica sempre no final da descrição para que o prefixo
+# estático (instruções + schema das ferramentas) seja reaproveitado pelo cache
+# de prompt do provedor (automático na OpenAI e implícito no Gemini)
+ARQUIVOS_IMPORTANTES_SUFIXO = "Os arquivos importantes são: {arquivos_importantes}"
+
+# Arquivos ignorados pelas ferramentas: binários, gerados ou grandes demais para o LLM
+MAX_READABLE_FILE_SIZE = 256 * 1024
+SKIPPED_FILE_SUFFIXES = (
+    '.png', '.jpg', '.gif', '.pdf', '.zip', '.jar', '.so', '.dll',
+    '.woff', '.ttf', '.mp4', '.lock', '.min.js', '.min.css'
+)
+
+# Número máximo de linhas retornadas pelo FileReader em uma única chamada
+READ_LINES_LIMIT = 400
+
+# Limite do cache de conteúdo dos arquivos lidos pelo FileReader (em caracteres, ~32 MiB)
+CONTENT_CACHE_MAX_SIZE = 32 * 1024 * 1024
+
+# Nível de risco de segurança pelo total de problemas: 0 -> Baixo, até 3 -> Médio, acima -> Alto
+SECURITY_RISK_BOUNDS = (0, 3)
+SECURITY_RISK_LEVELS = ("Baixo", "Médio", "Alto")
+
+# Métricas que contam como problemas no score geral de cada categoria
+CATEGORY_METRIC_KEYS = {
+    "seguranca": ("funcoes_sem_tratamento", "vulnerabilidades_encontradas"),
+    "desempenho": ("estruturas_ineficientes", "funcoes_longas"),
+    "confiabilidade": ("problemas_tratamento_erros", "violacoes_padroes"),
+    "testes": ("funcionalidades_sem_teste",),
+}
+
+# Score geral: parte de 100 e perde 5 pontos por problema encontrado
+QUALITY_SCORE_BASE = 100
+QUALITY_SCORE_PENALTY = 5
+
+# Status geral pelo score (0-100): < 40, 40-59, 60-79 e >= 80
+DASHBOARD_STATUS_BOUNDS = (40, 60, 80)
+DASHBOARD_STATUS_LEVELS = ("Necessita melhorias", "Regular", "Bom", "Excelente")
+
+# Recomendação principal pelo total de problemas: 0, até 5, até 15 e acima
+MAIN_RECOMMENDATION_BOUNDS = (0, 5, 15)
+MAIN_RECOMMENDATIONS = (
+    "Código em excelente estado! Continue mantendo as boas práticas.",
+    "Código em bom estado com poucos problemas. Revise as recomendações específicas.",
+    "Código necessita melhorias. Priorize correções de segurança e performance.",
+    "Código necessita revisão urgente. Implemente melhorias significativas na qualidade.",
+)
+
+# Tipos que já são JSON serializáveis e não precisam ser percorridos
+_JSON_PRIMITIVE_TYPES = frozenset((str, int, float, bool, type(None)))
+_MAX_SERIALIZATION_DEPTH = 1000
+_MISSING = object()
+
+# Cache persistente das respostas dos crews
+CACHE_DIR = os.getenv('ANALISADOR_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'analisador_qualidade'))
+CACHE_TTL = 7 * 86400  # 7 dias
+
+
+class ResponseCache:
+    """Cache em SQLite das respostas dos crews, com expiração por TTL."""
+    
+    def __init__(self, cache_dir: str, ttl: int = CACHE_TTL):
+        self.path = os.path.join(cache_dir, 'respostas.sqlite3')
+        self.ttl = ttl
+    
+    def _connect(self) -> sqlite3.Connection:
+        # Uma conexão por operação: seguro para uso a partir de várias threads
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS respostas ("
+            "chave TEXT PRIMARY KEY, valor TEXT NOT NULL, expira_em REAL NOT NULL)"
+        )
+        return conn
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Retorna o valor armazenado para a chave ou None se ausente/expirado."""
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    row = conn.execute(
+                        "SELECT valor, expira_em FROM respostas WHERE chave = ?", (key,)
+                    ).fetchone()
+                    if row is None:
+                        return None
+                    if row[1] < time.time():
+                        conn.execute("DELETE FROM respostas WHERE chave = ?", (key,))
+                        return None
+                    return json.loads(row[0])
+            finally:
+                conn.close()
+        except (sqlite3.Error, OSError, ValueError) as e:
+            print(f"⚠️ Erro ao consultar o cache: {str(e)}")
+            return None
+    
+    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        """Armazena um valor JSON serializável no cache."""
+        expira_em = time.time() + (self.ttl if ttl is None else ttl)
+        try:
+            conn = self._connect()
+            try:
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO respostas (chave, valor, expira_em) VALUES (?, ?, ?)",
+                        (key, json.dumps(value, ensure_ascii=False), expira_em)
+                    )
+            finally:
+                conn.close()
+        except (sqlite3.Error, OSError, TypeError, ValueError) as e:
+            print(f"⚠️ Erro ao gravar no cache: {str(e)}")
+
+
+RESPONSE_CACHE = ResponseCache(CACHE_DIR)
+
+
+# Schemas de entrada das ferramentas
+class FileReaderInput(BaseModel):
+    filename: str = Field(..., description="Nome do arquivo que deve ser lido e retornado o conteúdo")
+    start_line: int = Field(default=1, description="Primeira linha a ser retornada (começando em 1)")
+    end_line: Optional[int] = Field(
+        default=None,
+        description=f"Última linha a ser retornada (padrão e máximo: {READ_LINES_LIMIT} linhas a partir de start_line)"
+    )
+
+
+class FileSearchInput(BaseModel):
+    search_term: str = Field(..., description="Termo de busca para encontrar arquivos")
+    include_skipped: bool = Field(default=False, description="Incluir arquivos binários ou muito grandes")
+
+
+class FileListInput(BaseModel):
+    filter_extension: str = Field(default="", description="Filtro por extensão de arquivo")
+    include_skipped: bool = Field(default=False, description="Incluir arquivos binários ou muito grandes")
+
+
+# FileReaderTool
+class FileReaderTool(BaseTool):
+    model_config = {"extra": "allow"}
+    name: str = "FileReader"
+    description: str = "Ferramenta para ler o conteúdo de um arquivo específico do repositório."
+    args_schema: Type[BaseModel] = FileReaderInput
+    
+    def __init__(self, analyzer):
+        super().__init__()
+        self.analyzer = analyzer
+    
+    def _run(self, filename: str, start_line: int = 1, end_line: Optional[int] = None) -> str:
+        try:
+            if not self.analyzer.extracted_dir:
+                return "Erro: Diretório de arquivos não foi configurado."
+            
+            found = self.analyzer._find_file(filename)
+            if found is None:
+                return f"Arquivo '{filename}' não encontrado no repositório."
+            
+            file_path, rel_path, file = found
+            
+            if rel_path in self.analyzer._skipped_files:
+                size = self.analyzer._skipped_files[rel_path]
+                return f"Arquivo {rel_path} ignorado: binário ou muito grande ({size} bytes)."
+            
+            try:
+                content = self.analyzer._read_file_content(file_path, rel_path)
+            except Exception as e:
+                return f"Erro ao ler o arquivo {rel_path}: {str(e)}"
+            
+            # Retornar só o trecho pedido para limitar o tamanho de cada resposta
+            lines = content.splitlines(keepends=True)
+            total_lines = len(lines)
+            start_line = max(1, start_line)
+            # No máximo READ_LINES_LIMIT linhas por chamada, mesmo com um end_line maior
+            last_allowed = start_line + READ_LINES_LIMIT - 1
+            end_line = min(total_lines, last_allowed if end_line is None else min(end_line, last_allowed))
+            if start_line == 1 and end_line == total_lines:
+                return f"Conteúdo do arquivo {rel_path}:\n\n{content}"
+            if start_line > end_line:
+                return f"Intervalo de linhas inválido para o arquivo {rel_path}, que tem {total_lines} linhas."
+            
+            excerpt = "".join(lines[start_line - 1:end_line])
+            trailer = f"(exibindo linhas {start_line}-{end_line} de {total_lines}"
+            if end_line < total_lines:
+                next_end = min(total_lines, end_line + READ_LINES_LIMIT)
+                trailer += f"; chame novamente com start_line={end_line + 1} e end_line={next_end} para ver mais"
+            return f"Conteúdo do arquivo {rel_path}:\n\n{excerpt}\n\n{trailer})"
+        except Exception as e:
+            return f"Erro ao procurar o arquivo {filename}: {str(e)}"
+
+
+# FileSearchTool
+class FileSearchTool(BaseTool):
+    model_config = {"extra": "allow"}
+    name: str = "FileSearch"
+    description: str = "Ferramenta para buscar arquivos por termo parcial."
+    args_schema: Type[BaseModel] = FileSearchInput
+    
+    def __init__(self, analyzer):
+        super().__init__()
+        self.analyzer = analyzer
+    
+    def _run(self, search_term: str, include_skipped: bool = False) -> str:
+        try:
+            if not self.analyzer.extracted_dir:
+                return "Erro: Diretório de arquivos não foi configurado."
+            
+            search_lower = search_term.lower()
+            file_index = self.analyzer._file_index
+            skipped_files = {} if include_skipped else self.analyzer._skipped_files
+            
+            # O basename está contido no caminho relativo, então basta um teste
+            matching_files = [
+                file_index[i][1]
+                for i, rel_lower in enumerate(self.analyzer._rel_paths_lower)
+                if search_lower in rel_lower and file_index[i][1] not in skipped_files
+            ]
+            
+            if matching_files:
+                files_str = "\n".join(matching_files)
+                return f"Arquivos encontrados com o termo '{search_term}':\n\n{files_str}"
+            else:
+                return f"Nenhum arquivo encontrado com o termo '{search_term}'"
+        except Exception as e:
+            return f"Erro ao buscar arquivos: {str(e)}"
+
+
+# FileListTool
+class FileListTool(BaseTool):
+    model_config = {"extra": "allow"}
+    name: str = "FileList"
+    description: str = "Ferramenta para listar todos os arquivos do repositório."
+    args_schema: Type[BaseModel] = FileListInput
+    
+    def __init__(self, analyzer):
+        super().__init__()
+        self.analyzer = analyzer
+    
+    def _run(self, filter_extension: str = "", include_skipped: bool = False) -> str:
+        try:
+            if not self.analyzer.extracted_dir:
+                return "Erro: Diretório de arquivos não foi configurado."
+            
+            files_list = self.analyzer._list_files(filter_extension, include_skipped)
+            
+            if files_list:
+                files_str = "\n".join(files_list)
+                filter_msg = f" (filtrado por {filter_extension})" if filter_extension else ""
+                return f"Arquivos encontrados no repositório{filter_msg}:\n\n{files_str}"
+            else:
+                return f"Nenhum arquivo encontrado com o filtro especificado: {filter_extension}"
+        except Exception as e:
+            return f"Erro ao listar arquivos: {str(e)}"
+
+
+# Modelos de saída das tarefas: definidos uma única vez, na importação do módulo
+class ArquivosImportantesOutput(BaseModel):
+    arquivos_importantes : list[str]
+    quantidade_arquivos_importantes : int
+
+
+class SegurancaOutput(BaseModel):
+    funcoes_sem_tratamento : str
+    vulnerabilidades_sast : str
+    quantidade_funcoes_sem_tratamento : int
+    quantidade_vulnerabilidades : int
+    recomendacoes : list[str]
+
+
+class DesempenhoOutput(BaseModel):
+    estruturas_ineficientes : str
+    funcoes_longas : str
+    quantidade_estruturas_ineficientes : int
+    quantidade_funcoes_longas : int
+    recomendacoes : list[str]
+
+
+class ConfiabilidadeOutput(BaseModel):
+    problemas_tratamento_erros : str
+    violacoes_padroes : str
+    quantidade_problemas_erros : int
+    quantidade_violacoes_padroes : int
+    nivel_confiabilidade : str
+    recomendacoes : list[str]
+
+
+class TestesOutput(BaseModel):
+    arquivos_teste : str
+    funcionalidades_sem_teste : str
+    quantidade_testes : int
+    quantidade_funcionalidades_sem_teste : int
+    percentual_cobertura_estimado : int
+    recomendacoes : list[str]
+
+
+@dataclass(frozen=True)
+class CrewSpec:
+    """Especificação de um crew de análise (agente + tarefa)."""
+    role: str
+    goal: str
+    backstory: str
+    description: str
+    expected_output: str
+    output_model: Type[BaseModel]
+
+
+# Crews de análise, na ordem em que aparecem no resultado
+ANALYSIS_SPECS: Dict[str, CrewSpec] = {
+    "seguranca": CrewSpec(
+        role="analista_de_seguranca",
+        goal="""Analisar código fonte em busca de falhas de segurança, focando em:
+            1. Funções sem tratamento adequado de dados sensíveis
+            2. Vulnerabilidades SAST conhecidas""",
+        backstory="Especialista em segurança de software com foco em análise estática de código.",
+        description="""Analise o repositório em busca de vulnerabilidades de segurança.
+            Use FileList para ver arquivos, FileReader para analisar código.
+            Identifique: funções sem tratamento de dados sensíveis, vulnerabilidades SAST.
+            Analise somente os arquivos importantes para sua analise.
+            """,
+        expected_output="""JSON com:
+            - funcoes_sem_tratamento: lista de funções problemáticas
+            - vulnerabilidades_sast: lista de vulnerabilidades encontradas  
+            - quantidade_funcoes_sem_tratamento: número
+            - quantidade_vulnerabilidades: número
+            - recomendacoes: lista de melhorias""",
+        output_model=SegurancaOutput
+    ),
+    "desempenho": CrewSpec(
+        role="analista_de_desempenho",
+        goal="""Analisar desempenho do código, focando em:
+            1. Uso de estruturas de dados ineficientes
+            2. Funções/métodos longos e complexos""",
+        backstory="Especialista em otimização de performance e eficiência de código.",
+        description="""Analise o repositório em busca de problemas de desempenho.
+            Use FileList para ver arquivos, FileReader para analisar código.
+            Identifique: estruturas de dados ineficientes, funções muito longas.
+            """,
+        expected_output="""JSON com:
+            - estruturas_ineficientes: lista de problemas encontrados
+            - funcoes_longas: lista de funções com muitas linhas
+            - quantidade_estruturas_ineficientes: número
+            - quantidade_funcoes_longas: número
+            - recomendacoes: lista de melhorias""",
+        output_model=DesempenhoOutput
+    ),
+    "confiabilidade": CrewSpec(
+        role="analista_de_confiabilidade",
+        goal="""Analisar confiabilidade do código, focando em:
+            1. Cobertura de tratamento de erros
+            2. Aderência a padrões de codificação""",
+        backstory="Especialista em qualidade e confiabilidade de software.",
+        description="""Analise o repositório em busca de problemas de confiabilidade.
+            Use FileList para ver arquivos, FileReader para analisar código.
+            Identifique: funções sem tratamento de erros, violações de padrões.
+            """,
+        expected_output="""JSON com:
+            - problemas_tratamento_erros: lista de problemas encontrados
+            - violacoes_padroes: lista de violações de padrões
+            - quantidade_problemas_erros: número
+            - quantidade_violacoes_padroes: número
+            - nivel_confiabilidade: Alto/Médio/Baixo
+            - recomendacoes: lista de melhorias""",
+        output_model=ConfiabilidadeOutput
+    ),
+    "testes": CrewSpec(
+        role="analista_de_testes",
+        goal="""Analisar cobertura de testes, focando em:
+            1. Cobertura do código por testes unitários
+            2. Número de testes por funcionalidade""",
+        backstory="Especialista em estratégias de teste e qualidade de software.",
+        description="""Analise o repositório em busca de testes e cobertura.
+            Use FileList para ver arquivos, FileSearch para buscar testes, FileReader para analisar.
+            Identifique: arquivos de teste, funcionalidades sem testes.
+            """,
+        expected_output="""JSON com:
+            - arquivos_teste: lista de arquivos de teste encontrados
+            - funcionalidades_sem_teste: lista de funcionalidades sem cobertura
+            - quantidade_testes: número
+            - quantidade_funcionalidades_sem_teste: número
+            - percentual_cobertura_estimado: número
+            - recomendacoes: lista de melhorias""",
+        output_model=TestesOutput
+    ),
+}
+
+
+def _task_persona(role: str, goal: str, backstory: str) -> str:
+    """Monta o texto da especialidade do crew, colocado no início da descrição da tarefa."""
+    return f"Atue como {role}. {backstory}\nObjetivo: {goal}\n"
+
+
+def _iter_files(root: str) -> Iterator[os.DirEntry]:
+    """Percorre os arquivos sob root com os.scandir, ignorando diretórios .git.
+    
+    Diferente do os.walk, o tipo de cada entrada vem da própria leitura do
+    diretório, sem um stat adicional por arquivo.
+    """
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name != '.git':
+                        stack.append(entry.path)
+                else:
+                    yield entry
+
+
+def _extract_json_object(text: str) -> Optional[str]:
+    """Retorna o primeiro objeto JSON balanceado encontrado no texto.
+    
+    Percorre o texto uma única vez contando chaves e ignorando as que
+    aparecem dentro de strings, evitando o backtracking de uma regex gulosa.
+    """
+    start = text.find('{')
+    if start == -1:
+        return None
+    
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        char = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return text[start:i + 1]
+    return None
+
+
+def resolve_commit_sha(repo_url: str) -> Optional[str]:
+    """Retorna o commit do HEAD (branch padrão) do repositório remoto, ou None se falhar.
+    
+    Usa `git ls-remote`, que lê só as referências do servidor sem baixar objetos.
+    """
+    try:
+        result = subprocess.run(
+            ['git', 'ls-remote', repo_url, 'HEAD'],
+            capture_output=True,
+            text=True,
+            timeout=GIT_LS_REMOTE_TIMEOUT,
+            env={**os.environ, 'GIT_TERMINAL_PROMPT': '0'}
+        )
+    except (OSError, subprocess.SubprocessError) as e:
+        print(f"⚠️ Não foi possível consultar o commit de {repo_url}: {str(e)}")
+        return None
+    
+    fields = result.stdout.split()
+    if result.returncode != 0 or not fields:
+        return None
+    return fields[0]
+
+
+@functools.lru_cache(maxsize=32)
+def _get_llm(model: str, api_key: str) -> LLM:
+    """Cria o LLM de cada (modelo, chave) uma única vez.
+    
+    Analisadores e crews simultâneos compartilham a instância, reaproveitando o
+    cliente HTTP e as conexões com o provedor entre as análises.
+    """
+    if model == "gemini":
+        return LLM(
+            model="gemini/gemini-2.0-flash",
+            temperature=0.0,
+            api_key=api_key,
+        )
+    elif model == "gpt4-mini":
+        return LLM(
+            model="openai/gpt-4.1-mini",
+            temperature=0.0,
+            api_key=api_key,
+        )
+    raise ValueError(f"Modelo não suportado: {model}")
+
 
 class RepositoryAnalyzer:
-    """Classe principal para análise de qualidade de repositórios."""
+    """Classe principal para análise de qualidade de repositórios.
+    
+    Uma instância executa uma análise por vez: o diretório extraído, o índice de
+    arquivos e o cache de conteúdo pertencem à execução em andamento. Para análises
+    simultâneas, crie uma instância para cada; o LLM já é compartilhado entre elas.
+    """
     
-    def __init__(self, api_key: str, model: str = "gemini"):
-        """Inicializa o analisador com a chave da API e modelo especificado."""
+    def __init__(self, api_key: str, model: str = "gemini", keep_raw: bool = False,
+                 raw_dir: Optional[str] = None):
+        """Inicializa o analisador com a chave da API e modelo especificado.
+        
+        Com keep_raw=True, os dados brutos de cada análise são gravados em
+        raw_{tipo}.json.gz no diretório raw_dir (padrão: diretório atual).
+        """
         self.api_key = api_key
         self.model = model
+        self.keep_raw = keep_raw
+        self.raw_dir = raw_dir
         self.extracted_dir = None
+        self.temp_zip_file = None
         self.llm = None
         self.tools = {}
+        self._content_cache_lock = threading.Lock()
+        self._reset_file_index()
         self._setup_environment()
         self._setup_llm()
         self._setup_tools()
     
-    def _make_json_serializable(self, obj):
+    @staticmethod
+    def _make_json_serializable(obj):
         """Converte objetos para formato JSON serializável."""
-        if isinstance(obj, dict):
-            return {k: self._make_json_serializable(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self._make_json_serializable(item) for item in obj]
-        elif hasattr(obj, '__dict__'):
-            # Para objetos com atributos, converter para dict
-            return self._make_json_serializable(obj.__dict__)
-        elif hasattr(obj, 'json'):
-            # Se tem método json, usar ele
-            return obj.json
-        elif hasattr(obj, 'raw'):
-            # Se tem atributo raw, usar ele
-            return str(obj.raw)
-        else:
-            # Para outros tipos, converter para string
-            try:
-                json.dumps(obj)  # Testar se é serializável
-                return obj
-            except TypeError:
-                return str(obj)
+        if type(obj) in _JSON_PRIMITIVE_TYPES:
+            return obj
+        
+        # Percurso iterativo com pilha explícita: evita o custo da recursão e
+        # o limite de profundidade do Python em saídas muito aninhadas
+        root = [None]
+        stack = deque([(root, 0, obj, 0)])
+        while stack:
+            parent, key, value, depth = stack.pop()
+            
+            # Caminho rápido para as folhas mais comuns; comparação exata de tipo
+            # (sem percorrer a MRO), já que as saídas do CrewAI não herdam de primitivos
+            if type(value) in _JSON_PRIMITIVE_TYPES:
+                parent[key] = value
+                continue
+            
+            if depth > _MAX_SERIALIZATION_DEPTH:
+                # Estrutura muito profunda (ou cíclica): representar como texto
+                parent[key] = str(value)
+            elif isinstance(value, dict):
+                converted = {}
+                parent[key] = converted
+                for k, v in value.items():
+                    converted[k] = None  # Reserva a posição para manter a ordem das chaves
+                    stack.append((converted, k, v, depth + 1))
+            elif isinstance(value, list):
+                converted = [None] * len(value)
+                parent[key] = converted
+                for i, item in enumerate(value):
+                    stack.append((converted, i, item, depth + 1))
+            elif hasattr(value, '__dict__'):
+                # Para objetos com atributos, converter para dict
+                stack.append((parent, key, value.__dict__, depth + 1))
+            elif (json_attr := getattr(value, 'json', _MISSING)) is not _MISSING:
+                # Se tem método json, usar ele
+                parent[key] = json_attr
+            elif (raw := getattr(value, 'raw', _MISSING)) is not _MISSING:
+                # Se tem atributo raw, usar ele
+                parent[key] = str(raw)
+            else:
+                # Para outros tipos, converter para string
+                try:
+                    orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)  # Testar se é serializável
+                    parent[key] = value
+                except TypeError:
+                    parent[key] = str(value)
+        return root[0]
     
     def _process_analysis_data(self, analysis_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
         """Processa e simplifica os dados de análise para dashboard."""
+        # Os dados brutos não vão para o resultado: ver keep_raw/_save_raw_data
         processed = {
             "metricas": {},
-            "recomendacoes": "",
-            "dados_completos": data
+            "recomendacoes": ""
         }
         
         # Extrair métricas numéricas baseadas no tipo de análise
         if analysis_type == "seguranca":
+            funcoes_sem_tratamento = data.get("quantidade_funcoes_sem_tratamento", 0)
+            vulnerabilidades = data.get("quantidade_vulnerabilidades", 0)
             processed["metricas"] = {
-                "funcoes_sem_tratamento": data.get("quantidade_funcoes_sem_tratamento", 0),
-                "vulnerabilidades_encontradas": data.get("quantidade_vulnerabilidades", 0),
-                "nivel_risco": self._calculate_security_risk_level(data)
+                "funcoes_sem_tratamento": funcoes_sem_tratamento,
+                "vulnerabilidades_encontradas": vulnerabilidades,
+                "nivel_risco": self._calculate_security_risk_level(funcoes_sem_tratamento, vulnerabilidades)
             }
         elif analysis_type == "desempenho":
+            estruturas_ineficientes = data.get("quantidade_estruturas_ineficientes", 0)
+            funcoes_longas = data.get("quantidade_funcoes_longas", 0)
             processed["metricas"] = {
-                "estruturas_ineficientes": data.get("quantidade_estruturas_ineficientes", 0),
-                "funcoes_longas": data.get("quantidade_funcoes_longas", 0),
-                "score_performance": self._calculate_performance_score(data)
+                "estruturas_ineficientes": estruturas_ineficientes,
+                "funcoes_longas": funcoes_longas,
+                "score_performance": self._calculate_performance_score(estruturas_ineficientes, funcoes_longas)
             }
         elif analysis_type == "confiabilidade":
             processed["metricas"] = {
@@ -105,30 +686,19 @@ class RepositoryAnalyzer:
         
         return processed
     
-    def _calculate_security_risk_level(self, data: Dict[str, Any]) -> str:
+    @staticmethod
+    def _calculate_security_risk_level(funcoes_sem_tratamento: int, vulnerabilidades: int) -> str:
         """Calcula o nível de risco de segurança."""
-        funcoes_sem_tratamento = data.get("quantidade_funcoes_sem_tratamento", 0)
-        vulnerabilidades = data.get("quantidade_vulnerabilidades", 0)
-        
         total_issues = funcoes_sem_tratamento + vulnerabilidades
-        
-        if total_issues == 0:
-            return "Baixo"
-        elif total_issues <= 3:
-            return "Médio"
-        else:
-            return "Alto"
+        return SECURITY_RISK_LEVELS[bisect.bisect_left(SECURITY_RISK_BOUNDS, total_issues)]
     
-    def _calculate_performance_score(self, data: Dict[str, Any]) -> int:
+    @staticmethod
+    def _calculate_performance_score(estruturas_ineficientes: int, funcoes_longas: int) -> int:
         """Calcula o score de performance (0-100)."""
-        estruturas_ineficientes = data.get("quantidade_estruturas_ineficientes", 0)
-        funcoes_longas = data.get("quantidade_funcoes_longas", 0)
-        
         total_issues = estruturas_ineficientes + funcoes_longas
         
         # Score base 100, diminui 10 pontos por cada problema
-        score = max(0, 100 - (total_issues * 10))
-        return score
+        return max(0, 100 - (total_issues * 10))
     
     def _setup_environment(self):
         """Configura as variáveis de ambiente necessárias."""
@@ -140,162 +710,161 @@ class RepositoryAnalyzer:
     
     def _setup_llm(self):
         """Configura o modelo LLM."""
-        if self.model == "gemini":
-            self.llm = LLM(
-                model="gemini/gemini-2.0-flash",
-                temperature=0.0,
-                api_key=self.api_key,
-            )
-        elif self.model == "gpt4-mini":
-            self.llm = LLM(
-                model="openai/gpt-4.1-mini",
-                temperature=0.0,
-                api_key=self.api_key,
-            )
-        else:
-            raise ValueError(f"Modelo não suportado: {self.model}")
+        self.llm = _get_llm(self.model, self.api_key)
     
     def _setup_tools(self):
         """Configura as ferramentas personalizadas para análise de arquivos."""
+        # Criar instâncias das ferramentas
+        self.tools['file_reader'] = FileReaderTool(self)
+        self.tools['file_search'] = FileSearchTool(self)
+        self.tools['file_list'] = FileListTool(self)
+    
+    def _agent_tools(self) -> list:
+        """Retorna as ferramentas sempre na mesma ordem para todos os agentes."""
+        return [self.tools[name] for name in TOOL_ORDER]
+    
+    def _reset_file_index(self):
+        """Descarta o índice de arquivos do repositório extraído."""
+        self._file_index = []
+        self._by_basename = {}
+        self._by_ext = {}
+        self._by_path_suffix = {}
+        self._rel_paths_lower = []
+        self._rel_paths_blob = ""
+        self._rel_path_offsets = []
+        self._skipped_files = {}
+        with self._content_cache_lock:
+            self._content_cache = OrderedDict()
+            self._content_cache_size = 0
+    
+    def _build_file_index(self):
+        """Indexa uma única vez os arquivos extraídos para consulta pelas ferramentas."""
+        self._reset_file_index()
         
-        # Input schemas
-        class FileReaderInput(BaseModel):
-            filename: str = Field(..., description="Nome do arquivo que deve ser lido e retornado o conteúdo")
-        
-        class FileSearchInput(BaseModel):
-            search_term: str = Field(..., description="Termo de busca para encontrar arquivos")
+        entries = []
+        for entry in _iter_files(self.extracted_dir):
+            rel_path = os.path.relpath(entry.path, self.extracted_dir)
+            entries.append((entry.path, rel_path, entry.name))
+            
+            # Binários e arquivos grandes não são lidos pelas ferramentas
+            size = entry.stat(follow_symlinks=False).st_size
+            if size > MAX_READABLE_FILE_SIZE or entry.name.lower().endswith(SKIPPED_FILE_SUFFIXES):
+                self._skipped_files[rel_path] = size
         
-        class FileListInput(BaseModel):
-            filter_extension: str = Field(default="", description="Filtro por extensão de arquivo")
+        # Ordenar por caminho relativo para que todas as listagens já saiam ordenadas
+        entries.sort(key=lambda entry: entry[1])
         
-        # FileReaderTool
-        class FileReaderTool(BaseTool):
-            model_config = {"extra": "allow"}
-            name: str = "FileReader"
-            description: str = "Ferramenta para ler o conteúdo de um arquivo específico do repositório."
-            args_schema: Type[BaseModel] = FileReaderInput
-            
-            def __init__(self, analyzer):
-                super().__init__()
-                self.analyzer = analyzer
-            
-            def _run(self, filename: str) -> str:
-                try:
-                    if not self.analyzer.extracted_dir:
-                        return "Erro: Diretório de arquivos não foi configurado."
-                    
-                    found_files = []
-                    for root, dirs, files in os.walk(self.analyzer.extracted_dir):
-                        for file in files:
-                            file_path = os.path.join(root, file)
-                            rel_path = os.path.relpath(file_path, self.analyzer.extracted_dir)
-                            
-                            if (file == filename or file.endswith(filename) or 
-                                filename in file or filename in rel_path or 
-                                rel_path.endswith(filename) or os.path.basename(filename) == file):
-                                found_files.append((file_path, rel_path, file))
-                    
-                    if not found_files:
-                        return f"Arquivo '{filename}' não encontrado no repositório."
-                    
-                    file_path, rel_path, file = found_files[0]
-                    
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                        return f"Conteúdo do arquivo {rel_path}:\n\n{content}"
-                    except UnicodeDecodeError:
-                        try:
-                            with open(file_path, 'r', encoding='latin-1') as f:
-                                content = f.read()
-                            return f"Conteúdo do arquivo {rel_path}:\n\n{content}"
-                        except Exception as e:
-                            return f"Erro ao ler o arquivo {rel_path}: {str(e)}"
-                except Exception as e:
-                    return f"Erro ao procurar o arquivo {filename}: {str(e)}"
-        
-        # FileSearchTool
-        class FileSearchTool(BaseTool):
-            model_config = {"extra": "allow"}
-            name: str = "FileSearch"
-            description: str = "Ferramenta para buscar arquivos por termo parcial."
-            args_schema: Type[BaseModel] = FileSearchInput
-            
-            def __init__(self, analyzer):
-                super().__init__()
-                self.analyzer = analyzer
-            
-            def _run(self, search_term: str) -> str:
-                try:
-                    if not self.analyzer.extracted_dir:
-                        return "Erro: Diretório de arquivos não foi configurado."
-                    
-                    matching_files = []
-                    search_lower = search_term.lower()
-                    
-                    for root, dirs, files in os.walk(self.analyzer.extracted_dir):
-                        for file in files:
-                            rel_path = os.path.relpath(os.path.join(root, file), self.analyzer.extracted_dir)
-                            if search_lower in file.lower() or search_lower in rel_path.lower():
-                                matching_files.append(rel_path)
-                    
-                    if matching_files:
-                        files_str = "\n".join(sorted(matching_files))
-                        return f"Arquivos encontrados com o termo '{search_term}':\n\n{files_str}"
-                    else:
-                        return f"Nenhum arquivo encontrado com o termo '{search_term}'"
-                except Exception as e:
-                    return f"Erro ao buscar arquivos: {str(e)}"
-        
-        # FileListTool
-        class FileListTool(BaseTool):
-            model_config = {"extra": "allow"}
-            name: str = "FileList"
-            description: str = "Ferramenta para listar todos os arquivos do repositório."
-            args_schema: Type[BaseModel] = FileListInput
+        offset = 0
+        for i, (file_path, rel_path, file) in enumerate(entries):
+            self._by_basename.setdefault(file, []).append(i)
+            ext = os.path.splitext(file)[1]
+            if ext:
+                self._by_ext.setdefault(ext, []).append(i)
             
-            def __init__(self, analyzer):
-                super().__init__()
-                self.analyzer = analyzer
+            # Sufixos do caminho com ao menos um diretório ("src/app.py", "pkg/src/app.py"...)
+            parts = rel_path.split(os.sep)
+            for k in range(len(parts) - 1):
+                self._by_path_suffix.setdefault('/'.join(parts[k:]), []).append(i)
             
-            def _run(self, filter_extension: str = "") -> str:
-                try:
-                    if not self.analyzer.extracted_dir:
-                        return "Erro: Diretório de arquivos não foi configurado."
-                    
-                    files_list = []
-                    for root, dirs, files in os.walk(self.analyzer.extracted_dir):
-                        for file in files:
-                            if not filter_extension or file.endswith(filter_extension):
-                                rel_path = os.path.relpath(os.path.join(root, file), self.analyzer.extracted_dir)
-                                files_list.append(rel_path)
-                    
-                    if files_list:
-                        files_str = "\n".join(sorted(files_list))
-                        filter_msg = f" (filtrado por {filter_extension})" if filter_extension else ""
-                        return f"Arquivos encontrados no repositório{filter_msg}:\n\n{files_str}"
-                    else:
-                        return f"Nenhum arquivo encontrado com o filtro especificado: {filter_extension}"
-                except Exception as e:
-                    return f"Erro ao listar arquivos: {str(e)}"
+            self._rel_paths_lower.append(rel_path.lower())
+            self._rel_path_offsets.append(offset)
+            offset += len(rel_path) + 1
         
-        # Criar instâncias das ferramentas
-        self.tools['file_reader'] = FileReaderTool(self)
-        self.tools['file_search'] = FileSearchTool(self)
-        self.tools['file_list'] = FileListTool(self)
+        # Entre vários candidatos o caminho mais raso vem primeiro: "src/app.py" deve achar
+        # <repo>-<branch>/src/app.py antes de <repo>-<branch>/pkg/src/app.py
+        depths = [rel_path.count(os.sep) for _, rel_path, _ in entries]
+        for index in (self._by_basename, self._by_path_suffix):
+            for indices in index.values():
+                if len(indices) > 1:
+                    indices.sort(key=depths.__getitem__)
+        
+        # Todos os caminhos em uma única string permitem a busca parcial com str.find
+        self._rel_paths_blob = "\n".join(entry[1] for entry in entries)
+        self._file_index = entries
     
-    def _generate_secure_filename(self, repo_url: str) -> str:
-        """Gera um nome de arquivo seguro com hash e salt."""
-        # Gerar salt aleatório
-        salt = secrets.token_hex(16)
+    def _find_file(self, filename: str):
+        """Localiza um arquivo no índice, priorizando o nome exato do arquivo."""
+        query = filename.replace('\\', '/')
+        while query.startswith('./'):
+            query = query[2:]
+        query = query.lstrip('/')
+        
+        # Caminho com diretório: procurar pelo sufixo exato do caminho
+        if '/' in query:
+            indices = self._by_path_suffix.get(query)
+            if indices:
+                return self._file_index[indices[0]]
+        
+        indices = self._by_basename.get(os.path.basename(query))
+        if indices:
+            return self._file_index[indices[0]]
+        
+        # Busca parcial no caminho relativo (cobre também o nome do arquivo)
+        if not filename or "\n" in filename:
+            return None
+        pos = self._rel_paths_blob.find(filename)
+        if pos == -1:
+            return None
+        return self._file_index[bisect.bisect_right(self._rel_path_offsets, pos) - 1]
+    
+    def _read_file_content(self, file_path: str, rel_path: str) -> str:
+        """Lê o conteúdo de um arquivo do índice, com cache LRU limitado em tamanho."""
+        with self._content_cache_lock:
+            content = self._content_cache.get(rel_path)
+            if content is not None:
+                self._content_cache.move_to_end(rel_path)
+                return content
+        
+        content = Path(file_path).read_text(encoding='utf-8', errors='replace')
         
-        # Criar hash do URL + salt + timestamp
-        timestamp = str(datetime.now().timestamp())
-        data_to_hash = f"{repo_url}{salt}{timestamp}".encode('utf-8')
-        hash_object = hashlib.sha256(data_to_hash)
-        file_hash = hash_object.hexdigest()[:16]  # Primeiros 16 caracteres
+        with self._content_cache_lock:
+            if rel_path not in self._content_cache:
+                self._content_cache[rel_path] = content
+                self._content_cache_size += len(content)
+                # Remover os menos usados até voltar ao limite
+                while self._content_cache_size > CONTENT_CACHE_MAX_SIZE and len(self._content_cache) > 1:
+                    _, evicted = self._content_cache.popitem(last=False)
+                    self._content_cache_size -= len(evicted)
+        return content
+    
+    def _list_files(self, filter_extension: str = "", include_skipped: bool = False) -> list:
+        """Lista os caminhos relativos do índice, opcionalmente filtrados por extensão."""
+        if not filter_extension:
+            files = [entry[1] for entry in self._file_index]
+        elif filter_extension in self._by_ext:
+            files = [self._file_index[i][1] for i in self._by_ext[filter_extension]]
+        else:
+            # Filtros que não são extensões exatas (ex.: "py" ou "config.json")
+            files = [entry[1] for entry in self._file_index if entry[2].endswith(filter_extension)]
         
-        return f"repo_{file_hash}_{salt[:8]}.zip"
+        if include_skipped or not self._skipped_files:
+            return files
+        return [rel_path for rel_path in files if rel_path not in self._skipped_files]
+    
+    def _compute_repo_digest(self) -> str:
+        """Calcula um hash do conteúdo do repositório extraído."""
+        repo_hash = hashlib.sha256()
+        # O índice já está ordenado por caminho relativo
+        for file_path, rel_path, file in self._file_index:
+            file_hash = hashlib.sha256()
+            with open(file_path, 'rb') as f:
+                for block in iter(lambda: f.read(COPY_BUFFER_SIZE), b''):
+                    file_hash.update(block)
+            repo_hash.update(rel_path.encode('utf-8'))
+            repo_hash.update(b'\0')
+            repo_hash.update(file_hash.digest())
+        return repo_hash.hexdigest()
+    
+    def _cache_key(self, *parts: str) -> str:
+        """Monta a chave do cache de respostas a partir das partes informadas."""
+        return hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()
+    
+    def _generate_secure_filename(self, repo_url: str) -> str:
+        """Gera um nome de arquivo único e imprevisível para o ZIP baixado."""
+        # O token aleatório (96 bits) já garante a unicidade; o hash da URL só identifica a origem
+        url_hash = hashlib.blake2b(repo_url.encode('utf-8'), digest_size=8).hexdigest()
+        token = secrets.token_urlsafe(12).replace('-', '_')
+        return f"repo_{url_hash}_{token}.zip"
     
     def _cleanup_temp_files(self):
         """Remove arquivos temporários."""
@@ -311,10 +880,40 @@ class RepositoryAnalyzer:
                 shutil.rmtree(self.extracted_dir)
                 print(f"🗑️ Diretório temporário removido: {self.extracted_dir}")
                 self.extracted_dir = None
+            
+            self._reset_file_index()
                 
         except Exception as e:
             print(f"⚠️ Erro ao limpar arquivos temporários: {str(e)}")
     
+    def _resolve_branches(self, repo_url: str) -> list:
+        """Retorna os branches a tentar no download, começando pelo branch padrão do GitHub."""
+        path_parts = urlparse(repo_url).path.strip('/').split('/')
+        if len(path_parts) < 2:
+            return ["main", "master"]
+        repo_key = f"{path_parts[0]}/{path_parts[1]}"
+        
+        if repo_key in DEFAULT_BRANCH_CACHE:
+            return [DEFAULT_BRANCH_CACHE[repo_key]]
+        
+        try:
+            # O token vai só para a API do GitHub, nunca para URLs de download arbitrárias
+            headers = {'Authorization': f'Bearer {GITHUB_TOKEN}'} if GITHUB_TOKEN else None
+            response = HTTP_SESSION.get(
+                f"https://api.github.com/repos/{repo_key}", headers=headers, timeout=(10, 30)
+            )
+            if response.status_code == 200:
+                default_branch = response.json().get("default_branch")
+                if default_branch:
+                    DEFAULT_BRANCH_CACHE[repo_key] = default_branch
+                    return [default_branch]
+            print(f"⚠️ Não foi possível obter o branch padrão de {repo_key}: {response.status_code}")
+        except Exception as e:
+            print(f"⚠️ Não foi possível obter o branch padrão de {repo_key}: {str(e)}")
+        
+        # Sem a API (ex.: limite de requisições), tentar os nomes mais comuns
+        return ["main", "master"]
+    
     def download_repository(self, repo_url: str) -> bool:
         """Baixa o repositório a partir da URL."""
         try:
@@ -324,24 +923,32 @@ class RepositoryAnalyzer:
                     repo_url = repo_url[:-4]
                 if repo_url.endswith('/'):
                     repo_url = repo_url[:-1]
-                download_url = f"{repo_url}/archive/refs/heads/main.zip"
+                download_urls = [
+                    f"{repo_url}/archive/refs/heads/{branch}.zip"
+                    for branch in self._resolve_branches(repo_url)
+                ]
             else:
-                download_url = repo_url
-            
-            print(f"📥 Baixando repositório de: {download_url}")
-            response = requests.get(download_url, timeout=30)
+                download_urls = [repo_url]
             
-            if response.status_code == 200:
-                # Gerar nome de arquivo seguro
-                self.temp_zip_file = self._generate_secure_filename(repo_url)
+            for download_url in download_urls:
+                print(f"📥 Baixando repositório de: {download_url}")
+                with HTTP_SESSION.get(download_url, stream=True, timeout=(10, 60)) as response:
+                    if response.status_code != 200:
+                        print(f"❌ Erro ao baixar repositório: {response.status_code}")
+                        continue
+                    
+                    # Gerar nome de arquivo seguro
+                    self.temp_zip_file = self._generate_secure_filename(repo_url)
+                    
+                    # Gravar em blocos, sem manter o ZIP inteiro em memória
+                    with open(self.temp_zip_file, "wb") as f:
+                        for chunk in response.iter_content(chunk_size=COPY_BUFFER_SIZE):
+                            f.write(chunk)
                 
-                with open(self.temp_zip_file, "wb") as f:
-                    f.write(response.content)
                 print(f"✅ Repositório baixado: {self.temp_zip_file}")
                 return self._extract_repository(self.temp_zip_file)
-            else:
-                print(f"❌ Erro ao baixar repositório: {response.status_code}")
-                return False
+            
+            return False
                 
         except Exception as e:
             print(f"❌ Erro ao baixar repositório: {str(e)}")
@@ -351,9 +958,9 @@ class RepositoryAnalyzer:
         """Extrai o arquivo ZIP do repositório."""
         try:
             self.extracted_dir = tempfile.mkdtemp()
-            with zipfile.ZipFile(zip_filename, 'r') as zip_ref:
-                zip_ref.extractall(self.extracted_dir)
+            self._extract_members_parallel(zip_filename)
             
+            self._build_file_index()
             print(f"📂 Repositório extraído em: {self.extracted_dir}")
             return True
             
@@ -361,28 +968,77 @@ class RepositoryAnalyzer:
             print(f"❌ Erro ao extrair repositório: {str(e)}")
             return False
     
+    def _extract_members_parallel(self, zip_filename: str):
+        """Extrai os membros do ZIP em paralelo, um ZipFile por thread."""
+        base_dir = os.path.realpath(self.extracted_dir)
+        
+        def target_path(info: zipfile.ZipInfo) -> str:
+            # Mesma proteção contra path traversal feita pelo extractall
+            path = os.path.realpath(os.path.join(base_dir, info.filename))
+            if os.path.commonpath([base_dir, path]) != base_dir:
+                raise ValueError(f"Caminho inválido no arquivo ZIP: {info.filename}")
+            return path
+        
+        # Criar os diretórios sequencialmente evita corrida no os.makedirs
+        with zipfile.ZipFile(zip_filename, 'r') as zip_ref:
+            files = []
+            for info in zip_ref.infolist():
+                path = target_path(info)
+                if info.is_dir():
+                    os.makedirs(path, exist_ok=True)
+                else:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    files.append((info, path))
+        
+        # ZipFile não é thread-safe: cada worker abre o seu próprio
+        local = threading.local()
+        opened = []
+        opened_lock = threading.Lock()
+        
+        def extract(info: zipfile.ZipInfo, path: str):
+            zf = getattr(local, 'zip_ref', None)
+            if zf is None:
+                zf = local.zip_ref = zipfile.ZipFile(zip_filename, 'r')
+                with opened_lock:
+                    opened.append(zf)
+            with zf.open(info) as src, open(path, 'wb') as dst:
+                shutil.copyfileobj(src, dst, COPY_BUFFER_SIZE)
+        
+        try:
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                futures = [executor.submit(extract, info, path) for info, path in files]
+                # result() propaga a primeira exceção encontrada
+                for future in futures:
+                    future.result()
+        finally:
+            for zf in opened:
+                zf.close()
+    
+    def _create_agent(self) -> Agent:
+        """Cria um agente com a persona comum, igual em todos os crews."""
+        return Agent(
+            role=AGENT_ROLE,
+            goal=AGENT_GOAL,
+            backstory=AGENT_BACKSTORY,
+            tools=self._agent_tools(),
+            llm=self.llm
+        )
+    
     def _create_file_selector_crew(self) -> Crew:
         """Cria o crew de selecionar arquivos importantes para a analise"""
-        agent = Agent(
+        agent = self._create_agent()
+        persona = _task_persona(
             role="analista_de_arquivos_importantes",
             goal="""Selecionar arquivos relevantes para a análise de qualidade de código.""",
             backstory="""Você é um especialista em analisar arquivos em um projeto de software. 
                 Você deve indicar quais são os arquivos mais importantes de serem analisados.
                 Procure por arquivos de código-fonte, como .py, .js, .java, etc.
                 Procure por arquivos de configuração.
-                Informe, pelo menos, 10 arquivos, mas indique mais se houver.
-                Não informe mais de 20 arquivos.
-            """,
-            tools=list(self.tools.values()),
-            llm=self.llm
+            """
         )
 
-        class TaskOutput (BaseModel):
-            arquivos_importantes : list[str]
-            quantidade_arquivos_importantes : int
-
         task = Task(
-            description="""Analise o repositório em busca de arquivos importantes.
+            description=persona + """Analise o repositório em busca de arquivos importantes.
                 Use FileList para ver arquivos e FileSearch para localizar arquivos específicos.
                 Use FileReader para analisar os arquivos
                 Identifique: arquivos de configuração, scripts de build, etc.
@@ -394,272 +1050,201 @@ class RepositoryAnalyzer:
             - quantidade_arquivos_importantes: número""",
             agent=agent,
             llm=self.llm,
-            output_json=TaskOutput
+            output_json=ArquivosImportantesOutput
         )
 
         return Crew(agents=[agent], tasks=[task], llm=self.llm, verbose=True)
 
-    def _create_security_crew(self) -> Crew:
-        """Cria o crew de análise de segurança."""
-        agent = Agent(
-            role="analista_de_seguranca",
-            goal="""Analisar código fonte em busca de falhas de segurança, focando em:
-            1. Funções sem tratamento adequado de dados sensíveis
-            2. Vulnerabilidades SAST conhecidas""",
-            backstory="Especialista em segurança de software com foco em análise estática de código.",
-            tools=list(self.tools.values()),
-            llm=self.llm
-        )
-
-        class TaskOutput (BaseModel):
-            funcoes_sem_tratamento : str
-            vulnerabilidades_sast : str
-            quantidade_funcoes_sem_tratamento : int
-            quantidade_vulnerabilidades : int
-            recomendacoes : list[str]
-
-        task = Task(
-            description="""Analise o repositório em busca de vulnerabilidades de segurança.
-            Use FileList para ver arquivos, FileReader para analisar código.
-            Identifique: funções sem tratamento de dados sensíveis, vulnerabilidades SAST.
-            Analise somente os arquivos importantes para sua analise.
-            os arquivos importantes são: {arquivos_importantes}
-            """,
-            expected_output="""JSON com:
-            - funcoes_sem_tratamento: lista de funções problemáticas
-            - vulnerabilidades_sast: lista de vulnerabilidades encontradas  
-            - quantidade_funcoes_sem_tratamento: número
-            - quantidade_vulnerabilidades: número
-            - recomendacoes: lista de melhorias""",
-            agent=agent,
-            llm=self.llm,
-            output_json=TaskOutput
-        )
+    def _create_analysis_crew(self, analysis_type: str) -> Crew:
+        """Cria o crew de análise a partir da especificação registrada em ANALYSIS_SPECS."""
+        spec = ANALYSIS_SPECS[analysis_type]
+        agent = self._create_agent()
         
-        return Crew(agents=[agent], tasks=[task], llm=self.llm, verbose=True)
-    
-    def _create_performance_crew(self) -> Crew:
-        """Cria o crew de análise de desempenho."""
-        agent = Agent(
-            role="analista_de_desempenho",
-            goal="""Analisar desempenho do código, focando em:
-            1. Uso de estruturas de dados ineficientes
-            2. Funções/métodos longos e complexos""",
-            backstory="Especialista em otimização de performance e eficiência de código.",
-            tools=list(self.tools.values()),
-            llm=self.llm
-        )
-
-        class TaskOutput (BaseModel):
-            estruturas_ineficientes : str
-            funcoes_longas : str
-            quantidade_estruturas_ineficientes : int
-            quantidade_funcoes_longas : int
-            recomendacoes : list[str]
-
         task = Task(
-            description="""Analise o repositório em busca de problemas de desempenho.
-            Use FileList para ver arquivos, FileReader para analisar código.
-            Identifique: estruturas de dados ineficientes, funções muito longas.
-            os arquivos importantes são: {arquivos_importantes}
-            """,
-            expected_output="""JSON com:
-            - estruturas_ineficientes: lista de problemas encontrados
-            - funcoes_longas: lista de funções com muitas linhas
-            - quantidade_estruturas_ineficientes: número
-            - quantidade_funcoes_longas: número
-            - recomendacoes: lista de melhorias""",
+            description=(
+                _task_persona(spec.role, spec.goal, spec.backstory)
+                + spec.description + ARQUIVOS_IMPORTANTES_SUFIXO
+            ),
+            expected_output=spec.expected_output,
             agent=agent,
             llm=self.llm,
-            output_json=TaskOutput
+            output_json=spec.output_model
         )
         
         return Crew(agents=[agent], tasks=[task], llm=self.llm, verbose=True)
     
-    def _create_reliability_crew(self) -> Crew:
-        """Cria o crew de análise de confiabilidade."""
-        agent = Agent(
-            role="analista_de_confiabilidade",
-            goal="""Analisar confiabilidade do código, focando em:
-            1. Cobertura de tratamento de erros
-            2. Aderência a padrões de codificação""",
-            backstory="Especialista em qualidade e confiabilidade de software.",
-            tools=list(self.tools.values()),
-            llm=self.llm
-        )
-
-        class TaskOutput (BaseModel):
-            funcoes_sem_tratamento : str
-            vulnerabilidades_sast : str
-            quantidade_funcoes_sem_tratamento : int
-            quantidade_vulnerabilidades : int
-            recomendacoes : list[str]
-
-        task = Task(
-            description="""Analise o repositório em busca de problemas de confiabilidade.
-            Use FileList para ver arquivos, FileReader para analisar código.
-            Identifique: funções sem tratamento de erros, violações de padrões.
-            Os arquivos importantes são: {arquivos_importantes}
-            """,
-            expected_output="""JSON com:
-            - problemas_tratamento_erros: lista de problemas encontrados
-            - violacoes_padroes: lista de violações de padrões
-            - quantidade_problemas_erros: número
-            - quantidade_violacoes_padroes: número
-            - nivel_confiabilidade: Alto/Médio/Baixo
-            - recomendacoes: lista de melhorias""",
-            agent=agent,
-            llm=self.llm,
-            output_json=TaskOutput
-        )
+    def _parse_crew_output(self, result) -> Optional[Dict[str, Any]]:
+        """Extrai os dados JSON do resultado (CrewOutput) de um crew."""
+        # Se o resultado tem um atributo 'json', usar ele
+        if hasattr(result, 'json') and result.json:
+            if isinstance(result.json, str):
+                return json.loads(result.json)
+            return result.json
         
-        return Crew(agents=[agent], tasks=[task], llm=self.llm, verbose=True)
+        # Caso contrário, procurar o JSON no texto bruto do resultado
+        if hasattr(result, 'raw'):
+            text = str(result.raw)
+        else:
+            text = str(result)
+        
+        json_text = _extract_json_object(text)
+        if json_text:
+            return json.loads(json_text)
+        return None
     
-    def _create_testing_crew(self) -> Crew:
-        """Cria o crew de análise de testes."""
-        agent = Agent(
-            role="analista_de_testes",
-            goal="""Analisar cobertura de testes, focando em:
-            1. Cobertura do código por testes unitários
-            2. Número de testes por funcionalidade""",
-            backstory="Especialista em estratégias de teste e qualidade de software.",
-            tools=list(self.tools.values()),
-            llm=self.llm
-        )
-
-        class TaskOutput (BaseModel):
-            arquivos_teste : str
-            funcionalidades_sem_teste : str
-            quantidade_testes : int
-            quantidade_funcionalidades_sem_teste : int
-            percentual_cobertura_estimado : int
-            recomendacoes : list[str]
-
-        task = Task(
-            description="""Analise o repositório em busca de testes e cobertura.
-            Use FileList para ver arquivos, FileSearch para buscar testes, FileReader para analisar.
-            Identifique: arquivos de teste, funcionalidades sem testes.
-            Os arquivos importantes são: {arquivos_importantes}
-            """,
-            expected_output="""JSON com:
-            - arquivos_teste: lista de arquivos de teste encontrados
-            - funcionalidades_sem_teste: lista de funcionalidades sem cobertura
-            - quantidade_testes: número
-            - quantidade_funcionalidades_sem_teste: número
-            - percentual_cobertura_estimado: número
-            - recomendacoes: lista de melhorias""",
-            agent=agent,
-            llm=self.llm,
-            output_json=TaskOutput
-        )
+    def _save_raw_data(self, analysis_type: str, data: Dict[str, Any]):
+        """Grava os dados brutos de uma análise em um arquivo JSON compactado."""
+        raw_path = os.path.join(self.raw_dir or os.getcwd(), f"raw_{analysis_type}.json.gz")
+        try:
+            with gzip.open(raw_path, 'wb', compresslevel=1) as f:
+                f.write(to_json_bytes(data))
+            print(f"📄 Dados brutos de {analysis_type} salvos em: {raw_path}")
+        except Exception as e:
+            print(f"⚠️ Erro ao salvar dados brutos de {analysis_type}: {str(e)}")
+    
+    def _run_analysis_crew(self, analysis_type: str, crew: Crew, cache_key: str,
+                           arquivos_importantes: list) -> Dict[str, Any]:
+        """Executa um crew de análise e retorna os dados processados para o dashboard."""
+        print(f"📊 Executando análise de {analysis_type}...")
+        cached_data = RESPONSE_CACHE.get(cache_key)
+        if cached_data is not None:
+            print(f"♻️ Análise de {analysis_type} reaproveitada do cache")
+            if self.keep_raw:
+                self._save_raw_data(analysis_type, cached_data)
+            return self._process_analysis_data(analysis_type, cached_data)
         
-        return Crew(agents=[agent], tasks=[task], llm=self.llm, verbose=True)
+        try:
+            result = crew.kickoff(inputs={'arquivos_importantes' : arquivos_importantes})
+            # Converter CrewOutput para formato serializável e parsear JSON
+            try:
+                parsed_data = self._parse_crew_output(result)
+                
+                # Se conseguiu parsear, processar os dados
+                if parsed_data:
+                    RESPONSE_CACHE.set(cache_key, parsed_data)
+                    if self.keep_raw:
+                        self._save_raw_data(analysis_type, parsed_data)
+                    return self._process_analysis_data(analysis_type, parsed_data)
+                else:
+                    return {"erro": "Não foi possível extrair dados JSON", "resultado_bruto": str(result)}
+            
+            except Exception as parse_error:
+                print(f"⚠️ Erro ao processar resultado de {analysis_type}: {str(parse_error)}")
+                return {"erro_processamento": str(parse_error), "resultado_bruto": str(result)}
+        
+        except Exception as e:
+            print(f"❌ Erro na análise de {analysis_type}: {str(e)}")
+            return {"erro": str(e)}
     
     def run_analysis(self, repo_url: str) -> Dict[str, Any]:
         """Executa a análise completa do repositório."""
+        results = {}
+        for campo, valor in self.iter_analysis(repo_url):
+            if campo == "analises":
+                analises = dict(valor)
+                # Manter a ordem original das categorias no resultado
+                valor = {analysis_type: analises[analysis_type] for analysis_type in ANALYSIS_SPECS if analysis_type in analises}
+            results[campo] = valor
+        return results
+    
+    def iter_analysis(self, repo_url: str) -> Iterator[Tuple[str, Any]]:
+        """Executa a análise completa, produzindo os campos do resultado à medida que ficam prontos.
+        
+        Produz pares (campo, valor) do nível superior do resultado. O valor de
+        "analises" é um iterador de pares (categoria, resultado), na ordem em que os
+        crews terminam, e deve ser consumido antes de avançar para o próximo campo.
+        """
         start_time = datetime.now()
         
         print("🚀 Iniciando análise de qualidade de código...")
         
         # Download e extração do repositório
         if not self.download_repository(repo_url):
-            return {"erro": "Falha ao baixar ou extrair o repositório"}
-        
-        results = {
-            "repositorio_url": repo_url,
-            "timestamp": start_time.isoformat(),
-            "status": "sucesso",
-            "modelo_usado": self.model,
-            "analises": {}
-        }
+            # Remove o ZIP parcial (falha no meio do download) ou a extração incompleta
+            self._cleanup_temp_files()
+            yield "erro", "Falha ao baixar ou extrair o repositório"
+            return
         
+        yield "repositorio_url", repo_url
+        yield "timestamp", start_time.isoformat()
+        yield "modelo_usado", self.model
+        
+        analises = {}
+        erros = []
+        try:
+            yield "analises", self._iter_analises(analises, erros)
+        finally:
+            # Limpeza completa de arquivos temporários
+            self._cleanup_temp_files()
+        
+        if erros:
+            yield "status", "erro_parcial"
+            yield "erro_geral", erros[0]
+        else:
+            yield "status", "sucesso"
+        
+        end_time = datetime.now()
+        yield "tempo_execucao", str(end_time - start_time)
+        
+        # Gerar resumo do dashboard
+        yield "dashboard", self._generate_dashboard_summary(
+            {analysis_type: analises[analysis_type] for analysis_type in ANALYSIS_SPECS if analysis_type in analises}
+        )
+        
+        print("✅ Análise concluída!")
+    
+    def _iter_analises(self, analises: Dict[str, Any], erros: List[str]) -> Iterator[Tuple[str, Any]]:
+        """Executa os crews de análise e produz (categoria, resultado) conforme cada um termina.
+        
+        Os resultados também são guardados em `analises`; um erro geral interrompe a
+        iteração e é registrado em `erros`.
+        """
         try:
             # Executar análises
-            crews = {
-                "seguranca": self._create_security_crew(),
-                "desempenho": self._create_performance_crew(),
-                "confiabilidade": self._create_reliability_crew(),
-                "testes": self._create_testing_crew()
-            }
+            crews = {analysis_type: self._create_analysis_crew(analysis_type) for analysis_type in ANALYSIS_SPECS}
 
             print("analisando arquivos importantes")
 
-            crew_arquivos_importantes = self._create_file_selector_crew()
-            arquivos_importantes_result = crew_arquivos_importantes.kickoff()
+            repo_digest = self._compute_repo_digest()
 
-            print(f"resultado arquivos importantes:{arquivos_importantes_result}")
+            # A seleção de arquivos depende só do conteúdo do repositório
+            selector_key = self._cache_key(repo_digest, "arquivos_importantes")
+            arquivos_importantes = RESPONSE_CACHE.get(selector_key)
+            if arquivos_importantes is None:
+                crew_arquivos_importantes = self._create_file_selector_crew()
+                arquivos_importantes_result = crew_arquivos_importantes.kickoff()
 
-            arquivos_importantes = arquivos_importantes_result['arquivos_importantes']
+                print(f"resultado arquivos importantes:{arquivos_importantes_result}")
 
-            # print("==================arquivos importantes são:", arquivos_importantes)
-
-            # return {}
+                arquivos_importantes = arquivos_importantes_result['arquivos_importantes']
+                RESPONSE_CACHE.set(selector_key, arquivos_importantes)
+            else:
+                print(f"♻️ Arquivos importantes reaproveitados do cache: {arquivos_importantes}")
 
-            for analysis_type, crew in crews.items():
-                print(f"📊 Executando análise de {analysis_type}...")
-                try:
-                    result = crew.kickoff(inputs={'arquivos_importantes' : arquivos_importantes})
-                    # Converter CrewOutput para formato serializável e parsear JSON
+            # Os crews são independentes e limitados pela latência do LLM:
+            # executá-los em paralelo reduz o tempo total para o do mais lento
+            with ThreadPoolExecutor(max_workers=len(crews)) as executor:
+                futures = {
+                    executor.submit(
+                        self._run_analysis_crew,
+                        analysis_type,
+                        crew,
+                        self._cache_key(repo_digest, analysis_type, self.model),
+                        arquivos_importantes
+                    ): analysis_type
+                    for analysis_type, crew in crews.items()
+                }
+                for future in as_completed(futures):
+                    analysis_type = futures[future]
                     try:
-                        parsed_data = None
-                        
-                        # Se o resultado tem um atributo 'json' ou 'raw', usar ele
-                        if hasattr(result, 'json') and result.json:
-                            if isinstance(result.json, str):
-                                parsed_data = json.loads(result.json)
-                            else:
-                                parsed_data = result.json
-                        elif hasattr(result, 'raw'):
-                            # Tentar parsear o raw como JSON
-                            import re
-                            raw_content = str(result.raw)
-                            json_match = re.search(r'\{.*\}', raw_content, re.DOTALL)
-                            if json_match:
-                                parsed_data = json.loads(json_match.group())
-                        elif isinstance(result, str):
-                            # Procurar por JSON no resultado
-                            import re
-                            json_match = re.search(r'\{.*\}', result, re.DOTALL)
-                            if json_match:
-                                parsed_data = json.loads(json_match.group())
-                        else:
-                            # Converter para string e tentar extrair JSON
-                            result_str = str(result)
-                            import re
-                            json_match = re.search(r'\{.*\}', result_str, re.DOTALL)
-                            if json_match:
-                                parsed_data = json.loads(json_match.group())
-                        
-                        # Se conseguiu parsear, processar os dados
-                        if parsed_data:
-                            results["analises"][analysis_type] = self._process_analysis_data(analysis_type, parsed_data)
-                        else:
-                            results["analises"][analysis_type] = {"erro": "Não foi possível extrair dados JSON", "resultado_bruto": str(result)}
-                            
-                    except Exception as parse_error:
-                        print(f"⚠️ Erro ao processar resultado de {analysis_type}: {str(parse_error)}")
-                        results["analises"][analysis_type] = {"erro_processamento": str(parse_error), "resultado_bruto": str(result)}
-                        
-                except Exception as e:
-                    print(f"❌ Erro na análise de {analysis_type}: {str(e)}")
-                    results["analises"][analysis_type] = {"erro": str(e)}
+                        analises[analysis_type] = future.result()
+                    except Exception as e:
+                        print(f"❌ Erro na análise de {analysis_type}: {str(e)}")
+                        analises[analysis_type] = {"erro": str(e)}
+                    yield analysis_type, analises[analysis_type]
             
         except Exception as e:
-            results["status"] = "erro_parcial"
-            results["erro_geral"] = str(e)
-        
-        finally:
-            # Limpeza completa de arquivos temporários
-            self._cleanup_temp_files()
-        
-        end_time = datetime.now()
-        results["tempo_execucao"] = str(end_time - start_time)
-        
-        # Gerar resumo do dashboard
-        results["dashboard"] = self._generate_dashboard_summary(results.get("analises", {}))
-        
-        print("✅ Análise concluída!")
-        return results
+            erros.append(str(e))
     
     def _generate_dashboard_summary(self, analises: Dict[str, Any]) -> Dict[str, Any]:
         """Gera um resumo para dashboard com métricas consolidadas."""
@@ -679,33 +1264,20 @@ class RepositoryAnalyzer:
                 dashboard["metricas_por_categoria"][categoria] = metricas
                 
                 # Contar problemas para score geral
-                if categoria == "seguranca":
-                    problemas = metricas.get("funcoes_sem_tratamento", 0) + metricas.get("vulnerabilidades_encontradas", 0)
-                elif categoria == "desempenho":
-                    problemas = metricas.get("estruturas_ineficientes", 0) + metricas.get("funcoes_longas", 0)
-                elif categoria == "confiabilidade":
-                    problemas = metricas.get("problemas_tratamento_erros", 0) + metricas.get("violacoes_padroes", 0)
-                elif categoria == "testes":
-                    problemas = metricas.get("funcionalidades_sem_teste", 0)
+                keys = CATEGORY_METRIC_KEYS.get(categoria, ())
+                problemas = sum(metricas.get(k, 0) for k in keys)
                 
                 total_problemas += problemas
                 categorias_avaliadas += 1
         
         # Calcular score geral (0-100)
         if categorias_avaliadas > 0:
-            score_base = 100
-            penalidade_por_problema = 5
-            dashboard["score_geral"] = max(0, score_base - (total_problemas * penalidade_por_problema))
+            dashboard["score_geral"] = max(0, QUALITY_SCORE_BASE - total_problemas * QUALITY_SCORE_PENALTY)
             
             # Determinar status geral
-            if dashboard["score_geral"] >= 80:
-                dashboard["status_geral"] = "Excelente"
-            elif dashboard["score_geral"] >= 60:
-                dashboard["status_geral"] = "Bom"
-            elif dashboard["score_geral"] >= 40:
-                dashboard["status_geral"] = "Regular"
-            else:
-                dashboard["status_geral"] = "Necessita melhorias"
+            dashboard["status_geral"] = DASHBOARD_STATUS_LEVELS[
+                bisect.bisect_right(DASHBOARD_STATUS_BOUNDS, dashboard["score_geral"])
+            ]
         
         dashboard["resumo_geral"] = {
             "total_problemas_encontrados": total_problemas,
@@ -718,14 +1290,21 @@ class RepositoryAnalyzer:
     
     def _get_main_recommendation(self, total_problemas: int) -> str:
         """Retorna a recomendação principal baseada no número de problemas."""
-        if total_problemas == 0:
-            return "Código em excelente estado! Continue mantendo as boas práticas."
-        elif total_problemas <= 5:
-            return "Código em bom estado com poucos problemas. Revise as recomendações específicas."
-        elif total_problemas <= 15:
-            return "Código necessita melhorias. Priorize correções de segurança e performance."
-        else:
-            return "Código necessita revisão urgente. Implemente melhorias significativas na qualidade."
+        return MAIN_RECOMMENDATIONS[bisect.bisect_left(MAIN_RECOMMENDATION_BOUNDS, total_problemas)]
+
+
+def _json_default(obj):
+    """Conversão dos objetos que o orjson não serializa sozinho (saídas do CrewAI etc.)."""
+    return RepositoryAnalyzer._make_json_serializable(obj)
+
+
+def to_json_bytes(obj: Any, option: int = 0) -> bytes:
+    """Serializa para JSON com orjson, sem percorrer antes o objeto em Python.
+    
+    Dicts, listas e primitivos são percorridos pelo próprio orjson; só os objetos
+    que ele não reconhece passam por _make_json_serializable.
+    """
+    return orjson.dumps(obj, default=_json_default, option=option | orjson.OPT_NON_STR_KEYS)
 
 
 def main():
@@ -738,25 +1317,28 @@ def main():
     parser.add_argument('--model', choices=['gemini', 'gpt4-mini'], default='gemini', 
                        help='Modelo de IA a ser usado (padrão: gemini)')
     parser.add_argument('--output', '-o', help='Arquivo de saída JSON (opcional)')
+    parser.add_argument('--keep-raw', action='store_true',
+                       help='Salvar os dados brutos de cada análise em raw_<tipo>.json.gz')
     
     args = parser.parse_args()
     
+    # Dados brutos ficam ao lado do arquivo de saída (ou no diretório atual)
+    raw_dir = os.path.dirname(os.path.abspath(args.output)) if args.output else None
+    
     # Criar analisador e executar
-    analyzer = RepositoryAnalyzer(args.api_key, args.model)
+    analyzer = RepositoryAnalyzer(args.api_key, args.model, keep_raw=args.keep_raw, raw_dir=raw_dir)
     results = analyzer.run_analysis(args.repo_url)
-
-    # Garantir que os resultados sejam serializáveis
-    results = analyzer._make_json_serializable(results)
     
     print("results:", results)
     
     # Salvar resultados
+    output = to_json_bytes(results, orjson.OPT_INDENT_2)
     if args.output:
-        with open(args.output, 'w', encoding='utf-8') as f:
-            json.dump(results, f, indent=2, ensure_ascii=False)
+        with open(args.output, 'wb') as f:
+            f.write(output)
         print(f"📄 Resultados salvos em: {args.output}")
     else:
-        print(json.dumps(results, indent=2, ensure_ascii=False))
+        print(output.decode('utf-8'))
 
 
 if __name__ == "__main__":
@@ -627,14 +627,20 @@ function displayRecommendations(results) {
     let html = '';
     
     categories.forEach((category, index) => {
-        let recommendations = analises[category]?.dados_completos.recomendacoes || [];
+        const analise = analises[category] || {};
+        // Resultados antigos trazem a lista original em dados_completos
+        let recommendations = analise.dados_completos?.recomendacoes ?? analise.recomendacoes ?? [];
 
         console.log('Recomendações de ' + categoryNames[index] + ':', recommendations);
 
         // Garantir que recommendations seja sempre um array
         if (typeof recommendations === 'string') {
-            // Se for uma string, dividir por quebras de linha ou vírgulas
-            recommendations = recommendations.split(/[,\n]/).filter(r => r.trim());
+            // Texto do servidor usa marcadores "• " (uma recomendação por linha, que pode
+            // conter vírgulas); strings sem marcador são separadas por vírgulas ou quebras de linha
+            const separator = /^\s*•/.test(recommendations) ? '\n' : /[,\n]/;
+            recommendations = recommendations.split(separator)
+                .map(r => r.replace(/^\s*•\s*/, ''))
+                .filter(r => r.trim());
         } else if (!Array.isArray(recommendations)) {
             recommendations = [];
         }
@@ -0,0 +1,28 @@
+"""
+Configuração do gunicorn para o servidor do Analisador de Qualidade.
+
+Uso: gunicorn --config gunicorn_conf.py servidor:app
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+# Workers com threads. O frontend usa /api/analyze-sync, que ocupa uma thread durante
+# toda a análise (fora do pool); por isso o padrão é uma thread por análise simultânea
+# (ANALYZER_POOL_SIZE) mais uma folga para a página, os arquivos estáticos e o polling
+ANALYZER_POOL_SIZE = int(os.getenv('ANALYZER_POOL_SIZE', '16'))
+REQUEST_THREADS_HEADROOM = 16
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', ANALYZER_POOL_SIZE + REQUEST_THREADS_HEADROOM))
+
+# Sem REDIS_URL as análises em andamento ficam na memória do processo que as criou
+# e o polling de /api/status poderia cair em outro worker, então o padrão é um único
+# processo; com o Redis compartilhado, dois por núcleo
+default_workers = 2 * (os.cpu_count() or 1) if os.getenv('REDIS_URL') else 1
+workers = int(os.getenv('WEB_CONCURRENCY', default_workers))
+
+# Importa o app (e o analisador/crewai) uma única vez antes do fork dos workers
+preload_app = True
+
+accesslog = '-'
@@ -5,75 +5,553 @@ Fornece uma API REST para o frontend web.
 """
 
 import os
-import json
-import tempfile
+import re
+import sys
 from datetime import datetime
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+from flask_compress import Compress
+import secrets
 import threading
-import queue
+import time
 import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
 
-# Importar o analisador
-from analisador_qualidade import RepositoryAnalyzer
+import orjson
+
+# Importar o analisador (crewai e clientes dos LLMs) já na inicialização, para que com
+# preload_app ele seja carregado uma única vez antes do fork; com LAZY_IMPORT definido
+# ele só é carregado na primeira análise, reduzindo o tempo de início e a memória ociosa
+if not os.getenv('LAZY_IMPORT'):
+    import analisador_qualidade  # noqa: F401
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class OrjsonProvider(DefaultJSONProvider):
+    """Provider JSON do Flask que serializa com orjson (jsonify, request.get_json)."""
+    option = orjson.OPT_NON_STR_KEYS
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self.option).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        # Gera os bytes diretamente, sem passar por str
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=self.option)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app)  # Permitir CORS para desenvolvimento
 
+# Compressão das respostas (relatórios JSON e arquivos do frontend); respostas
+# pequenas, como o polling de /api/status em andamento, seguem sem compressão
+app.config['COMPRESS_MIMETYPES'] = ['application/json', 'text/html', 'text/css', 'text/javascript']
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+# Arquivos do frontend saem em streaming (send_from_directory); sem gzip aqui eles
+# iriam sem compressão para clientes que não aceitam br
+app.config['COMPRESS_ALGORITHM_STREAMING'] = ['br', 'gzip']
+app.config['COMPRESS_LEVEL'] = 4
+app.config['COMPRESS_BR_LEVEL'] = 4
+app.config['COMPRESS_MIN_SIZE'] = 1024
+app.config['COMPRESS_REGISTER'] = False
+compress = Compress(app)
+
+@app.after_request
+def compress_response(response):
+    """Comprime a resposta, exceto o relatório em streaming de /api/analyze-sync.
+    
+    O compressor acumula os chunks no buffer e só os entregaria no final,
+    desfazendo o envio de cada campo assim que fica pronto. O relatório do
+    cache, enviado de uma vez pelo mesmo endpoint, é comprimido normalmente.
+    """
+    if request.endpoint == 'analyze_sync' and response.is_streamed:
+        return response
+    return compress.after_request(response)
+
+# URL de um repositório do GitHub: https://github.com/<dono>/<repositorio>
+GITHUB_REPO_URL_RE = re.compile(r'https?://(www\.)?github\.com/[\w.-]+/[\w.-]+/?')
+
 # Chave padrão do Gemini
 DEFAULT_API_KEY = os.getenv('DEFAULT_API_KEY')
 
-# Armazenar análises em andamento
-active_analyses = {}
+# Armazenar análises em andamento, na ordem de criação (a mais antiga primeiro)
+active_analyses = OrderedDict()
+analyses_lock = threading.Lock()
+
+# Análise em andamento para cada (repo_url, modelo): pedidos repetidos reaproveitam
+# o mesmo analysis_id em vez de iniciar outra análise (protegido por analyses_lock)
+pending = {}
+
+# Tempo máximo que uma análise fica na memória
+ANALYSIS_TTL_SECONDS = 3600
+
+# Resultados já serializados de análises bem-sucedidas, por (repo_url, commit, modelo),
+# do menos para o mais recentemente usado
+result_cache = OrderedDict()
+result_cache_lock = threading.Lock()
+RESULT_CACHE_MAX_SIZE = 128
+RESULT_CACHE_TTL_SECONDS = 3600
+# Chaves que marcam uma categoria que falhou no relatório
+RESULT_ERROR_KEYS = frozenset(('erro', 'erro_processamento', 'erro_geral'))
+
+# Acorda a thread de limpeza para recalcular o próximo prazo de expiração
+eviction_event = threading.Event()
+eviction_thread = None
+
+# Pool de workers para as análises: limita quantas rodam ao mesmo tempo
+# (as demais aguardam na fila) e evita criar uma thread nova por requisição
+EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv('ANALYZER_POOL_SIZE', '16')),
+    thread_name_prefix='analise'
+)
 
 class AnalysisStatus:
     """Classe para rastrear o status de uma análise."""
+    # Atributos fixos: sem __dict__ por instância, que ficam até uma hora na memória
+    __slots__ = ('id', 'status', 'progress', 'message', 'serialized_result', 'error', 'started_at', 'started_mono', 'subscribers')
+    
     def __init__(self, analysis_id):
         self.id = analysis_id
         self.status = 'iniciando'
         self.progress = 0
         self.message = 'Preparando análise...'
-        self.result = None
+        # Resultado já serializado (bytes JSON), gerado uma única vez pelo worker
+        self.serialized_result = None
         self.error = None
+        # Horário de início para exibição; a expiração usa o relógio monotônico
         self.started_at = datetime.now()
+        self.started_mono = time.monotonic()
+        # Clientes que aguardam o resultado; cada um o recebe uma vez
+        self.subscribers = 1
+    
+    def update(self, **fields):
+        """Altera vários campos de uma vez, sob um único analyses_lock, e os publica no armazenamento."""
+        with analyses_lock:
+            for name, value in fields.items():
+                setattr(self, name, value)
+        analyses_store.save(self)
 
-def run_analysis_worker(analysis_id, repo_url, api_key, model='gemini'):
-    """Worker thread para executar a análise."""
-    try:
-        status = active_analyses[analysis_id]
+def evict_expired_analyses(now):
+    """Remove as análises expiradas do início de active_analyses (chamar com analyses_lock)."""
+    while active_analyses:
+        analysis_id, status = next(iter(active_analyses.items()))
+        if now - status.started_mono <= ANALYSIS_TTL_SECONDS:
+            break
+        active_analyses.popitem(last=False)
+        logger.info(f"Análise antiga {analysis_id} removida da memória")
+
+def eviction_worker():
+    """Remove as análises no momento em que expiram, sem varreduras periódicas.
+    
+    Como o TTL é fixo, a próxima a expirar é sempre a primeira de active_analyses;
+    a thread dorme até esse prazo (ou indefinidamente, sem análises) e é acordada
+    por start_analysis quando uma análise é criada com a lista vazia.
+    """
+    while True:
+        try:
+            with analyses_lock:
+                now = time.monotonic()
+                evict_expired_analyses(now)
+                timeout = None
+                if active_analyses:
+                    oldest = next(iter(active_analyses.values()))
+                    timeout = ANALYSIS_TTL_SECONDS - (now - oldest.started_mono)
+        except Exception as e:
+            logger.error(f"Erro na limpeza: {str(e)}")
+            timeout = ANALYSIS_TTL_SECONDS
+        
+        eviction_event.wait(timeout)
+        eviction_event.clear()
+
+class MemoryAnalysisStore:
+    """Estado das análises na memória deste processo (active_analyses e pending)."""
+    
+    def start(self, status, key=None):
+        """Registra uma análise nova.
+        
+        Se `key` (repo_url, modelo) já tem uma análise em andamento, o cliente passa a
+        aguardá-la e o id dela é retornado no lugar; senão retorna None.
+        """
+        with analyses_lock:
+            evict_expired_analyses(status.started_mono)
+            if key is not None:
+                existing_id = self._join(key)
+                if existing_id is not None:
+                    return existing_id
+                pending[key] = status.id
+            ensure_eviction_worker()
+            if not active_analyses:
+                eviction_event.set()
+            active_analyses[status.id] = status
+        return None
+    
+    def _join(self, key):
+        """Inscreve o cliente na análise em andamento para `key` (chamar com analyses_lock)."""
+        existing = active_analyses.get(pending.get(key))
+        if existing is not None and existing.status != 'erro':
+            existing.subscribers += 1
+            return existing.id
+        return None
+    
+    def join(self, key):
+        """Inscreve o cliente na análise em andamento para `key` e retorna o id dela, ou None."""
+        with analyses_lock:
+            evict_expired_analyses(time.monotonic())
+            return self._join(key)
+    
+    def save(self, status):
+        """Publica as alterações do status (na memória o próprio objeto é compartilhado)."""
+    
+    def finish(self, status, key):
+        """Libera `key`: pedidos iguais a partir daqui iniciam uma nova análise."""
+        with analyses_lock:
+            if pending.get(key) == status.id:
+                del pending[key]
+    
+    def deliver(self, analysis_id):
+        """Retorna o status da análise, ou None.
+        
+        Resultado ou erro são entregues uma única vez a cada cliente e depois
+        removidos da memória.
+        """
+        with analyses_lock:
+            status = active_analyses.get(analysis_id)
+            if status is not None and status.status in ('concluido', 'erro'):
+                status.subscribers -= 1
+                if status.subscribers <= 0:
+                    del active_analyses[analysis_id]
+        return status
+    
+    def count(self):
+        """Número de análises na memória."""
+        return len(active_analyses)
+
+class RedisAnalysisStore:
+    """Estado das análises no Redis, compartilhado entre os processos do gunicorn.
+    
+    Cada análise é um hash `analise:<id>` com EXPIRE de ANALYSIS_TTL_SECONDS renovado
+    a cada atualização, então a limpeza fica a cargo do próprio Redis. O resultado
+    serializado fica em `analise:<id>:resultado`, a análise em andamento de cada
+    (repo_url, modelo) em `analise:pendente:<modelo>:<repo_url>` e o sorted set
+    `analises` (pela última atualização) serve só para a contagem do /api/health.
+    """
+    INDEX_KEY = 'analises'
+    
+    def __init__(self, url):
+        import redis
+        self.redis = redis.Redis.from_url(url)
+        self.watch_error = redis.WatchError
+    
+    def _key(self, analysis_id):
+        return f'analise:{analysis_id}'
+    
+    def _result_key(self, analysis_id):
+        return f'analise:{analysis_id}:resultado'
+    
+    def _pending_key(self, key):
+        repo_url, model = key
+        return f'analise:pendente:{model}:{repo_url}'
+    
+    def _write(self, pipe, status, fields):
+        """Enfileira no pipeline a gravação dos campos e do resultado, renovando o TTL."""
+        key = self._key(status.id)
+        pipe.hset(key, mapping=fields)
+        pipe.expire(key, ANALYSIS_TTL_SECONDS)
+        if status.serialized_result is not None:
+            pipe.set(self._result_key(status.id), status.serialized_result, ex=ANALYSIS_TTL_SECONDS)
+        pipe.zadd(self.INDEX_KEY, {status.id: time.time()})
+    
+    def _subscribe(self, analysis_id):
+        """Soma um cliente à análise se ela ainda existe e não falhou."""
+        key = self._key(analysis_id)
+        with self.redis.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    if pipe.hget(key, 'status') in (None, b'erro'):
+                        return False
+                    pipe.multi()
+                    pipe.hincrby(key, 'subscribers', 1)
+                    pipe.execute()
+                    return True
+                except self.watch_error:
+                    # O status mudou (ex.: progresso) entre a leitura e o incremento
+                    continue
+    
+    def _release(self, pending_key, analysis_id):
+        """Apaga pending_key somente se ela ainda aponta para analysis_id."""
+        with self.redis.pipeline() as pipe:
+            try:
+                pipe.watch(pending_key)
+                if pipe.get(pending_key) == analysis_id:
+                    pipe.multi()
+                    pipe.delete(pending_key)
+                    pipe.execute()
+            except self.watch_error:
+                # Outro pedido já trocou a chave
+                pass
+    
+    def _discard(self, analysis_id):
+        """Remove as chaves de uma análise."""
+        pipe = self.redis.pipeline()
+        pipe.delete(self._key(analysis_id), self._result_key(analysis_id))
+        pipe.zrem(self.INDEX_KEY, analysis_id)
+        pipe.execute()
+    
+    def join(self, key):
+        """Inscreve o cliente na análise em andamento para `key` e retorna o id dela, ou None."""
+        existing_id = self.redis.get(self._pending_key(key))
+        if existing_id is not None and self._subscribe(existing_id.decode()):
+            return existing_id.decode()
+        return None
+    
+    def start(self, status, key=None):
+        """Registra uma análise nova (mesma semântica de MemoryAnalysisStore.start).
         
+        O hash é gravado antes de reivindicar a chave pendente com SET NX, para que
+        um pedido igual que perca a disputa já encontre a análise e se inscreva nela.
+        """
+        pipe = self.redis.pipeline()
+        self._write(pipe, status, {
+            'status': status.status,
+            'progress': status.progress,
+            'message': status.message,
+            'error': status.error or '',
+            'started_at': status.started_at.isoformat(),
+            'subscribers': status.subscribers
+        })
+        pipe.execute()
+        if key is None:
+            return None
+        
+        pending_key = self._pending_key(key)
+        while not self.redis.set(pending_key, status.id, nx=True, ex=ANALYSIS_TTL_SECONDS):
+            existing_id = self.redis.get(pending_key)
+            if existing_id is None:
+                continue
+            if self._subscribe(existing_id.decode()):
+                self._discard(status.id)
+                return existing_id.decode()
+            # A análise pendente falhou ou expirou: libera a chave e disputa de novo
+            self._release(pending_key, existing_id)
+        return None
+    
+    def save(self, status):
+        """Grava no Redis o estado atual do status."""
+        pipe = self.redis.pipeline()
+        self._write(pipe, status, {
+            'status': status.status,
+            'progress': status.progress,
+            'message': status.message,
+            'error': status.error or ''
+        })
+        pipe.execute()
+    
+    def finish(self, status, key):
+        """Libera `key`: pedidos iguais a partir daqui iniciam uma nova análise."""
+        self._release(self._pending_key(key), status.id.encode())
+    
+    def deliver(self, analysis_id):
+        """Retorna o status da análise, ou None (mesma semântica de MemoryAnalysisStore.deliver).
+        
+        A leitura e a liberação do cliente acontecem numa transação (WATCH/MULTI):
+        o último cliente apaga as chaves, e um hash que já sumiu nunca é recriado.
+        """
+        key = self._key(analysis_id)
+        result_key = self._result_key(analysis_id)
+        with self.redis.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key, result_key)
+                    fields = pipe.hgetall(key)
+                    if b'status' not in fields:
+                        if fields:
+                            # Hash incompleto (sem status nem TTL): descartar
+                            pipe.multi()
+                            pipe.delete(key)
+                            pipe.execute()
+                        return None
+                    
+                    status = AnalysisStatus(analysis_id)
+                    status.status = fields[b'status'].decode()
+                    status.progress = int(fields[b'progress'])
+                    status.message = fields[b'message'].decode()
+                    status.error = fields[b'error'].decode() or None
+                    status.started_at = datetime.fromisoformat(fields[b'started_at'].decode())
+                    
+                    if status.status in ('concluido', 'erro'):
+                        # O resultado é lido antes de liberar este cliente: o último a recebê-lo apaga as chaves
+                        if status.status == 'concluido':
+                            status.serialized_result = pipe.get(result_key)
+                        pipe.multi()
+                        if int(fields.get(b'subscribers', 0)) <= 1:
+                            pipe.delete(key, result_key)
+                            pipe.zrem(self.INDEX_KEY, analysis_id)
+                        else:
+                            pipe.hincrby(key, 'subscribers', -1)
+                        pipe.execute()
+                    return status
+                except self.watch_error:
+                    # Outro cliente ou o worker alterou a análise: ler de novo
+                    continue
+    
+    def count(self):
+        """Número de análises ainda não expiradas."""
+        pipe = self.redis.pipeline()
+        pipe.zremrangebyscore(self.INDEX_KEY, '-inf', time.time() - ANALYSIS_TTL_SECONDS)
+        pipe.zcard(self.INDEX_KEY)
+        return pipe.execute()[1]
+
+# Com REDIS_URL definido o estado das análises fica no Redis e qualquer processo do
+# gunicorn responde ao polling; sem ele, fica na memória deste processo
+REDIS_URL = os.getenv('REDIS_URL')
+analyses_store = RedisAnalysisStore(REDIS_URL) if REDIS_URL else MemoryAnalysisStore()
+
+def run_analysis_worker(status, repo_url, api_key, model='gemini', commit_sha=None):
+    """Worker do pool para executar a análise."""
+    from analisador_qualidade import RepositoryAnalyzer, to_json_bytes
+    
+    # Qualquer exceção é registrada no status: a tarefa nunca termina sem resposta
+    try:
         # Criar analisador
-        status.message = 'Inicializando analisador...'
-        status.progress = 10
+        status.update(message='Inicializando analisador...', progress=10)
         analyzer = RepositoryAnalyzer(api_key, model)
         
         # Executar análise
-        status.message = 'Executando análise...'
-        status.progress = 20
+        status.update(message='Executando análise...', progress=20)
         results = analyzer.run_analysis(repo_url)
         
         # Processar resultados
-        status.message = 'Processando resultados...'
-        status.progress = 90
-        processed_results = analyzer._make_json_serializable(results)
+        status.update(message='Processando resultados...', progress=90)
+        serialized_result = to_json_bytes(results)
+        if commit_sha and is_complete_result(results):
+            cache_result((repo_url, commit_sha, model), serialized_result)
         
         # Finalizar
-        status.status = 'concluido'
-        status.progress = 100
-        status.message = 'Análise concluída!'
-        status.result = processed_results
+        status.update(
+            serialized_result=serialized_result,
+            status='concluido',
+            progress=100,
+            message='Análise concluída!'
+        )
         
-        logger.info(f"Análise {analysis_id} concluída com sucesso usando {model}")
+        logger.info(f"Análise {status.id} concluída com sucesso usando {model}")
         
     except Exception as e:
-        logger.error(f"Erro na análise {analysis_id}: {str(e)}")
-        status.status = 'erro'
-        status.error = str(e)
-        status.message = f'Erro na análise: {str(e)}'
+        logger.error(f"Erro na análise {status.id}: {str(e)}")
+        status.update(status='erro', error=str(e), message=f'Erro na análise: {str(e)}')
+    
+    finally:
+        # Pedidos iguais a partir daqui iniciam uma nova análise
+        analyses_store.finish(status, (repo_url, model))
+
+def get_cached_result(key):
+    """Retorna o resultado serializado em cache para a chave, ou None."""
+    with result_cache_lock:
+        entry = result_cache.get(key)
+        if entry is None:
+            return None
+        stored_at, serialized_result = entry
+        if time.monotonic() - stored_at > RESULT_CACHE_TTL_SECONDS:
+            del result_cache[key]
+            return None
+        result_cache.move_to_end(key)
+        return serialized_result
+
+def is_complete_result(results):
+    """Indica se o relatório pode ir para o cache: todas as categorias com métricas e sem erro.
+    
+    Falhas de um crew (ex.: limite de requisições do provedor) não mudam o status
+    geral, mas não devem ser servidas a todos que pedirem o mesmo commit.
+    """
+    if results.get('status') != 'sucesso' or 'erro_geral' in results:
+        return False
+    analises = results.get('analises')
+    return bool(analises) and all(
+        'metricas' in analise and not RESULT_ERROR_KEYS & analise.keys()
+        for analise in analises.values()
+    )
+
+class CompleteResultTracker:
+    """Aplica o critério de is_complete_result aos pares de iter_analysis enquanto passam.
+    
+    Permite decidir se o relatório em streaming vai para o cache sem montá-lo
+    nem relê-lo no final; `failed` fica verdadeiro assim que algo o impede.
+    """
+    __slots__ = ('categories', 'failed', 'succeeded')
+    
+    def __init__(self):
+        self.categories = 0
+        self.failed = False
+        self.succeeded = False
+    
+    def track(self, pares):
+        """Repassa os pares (campo, valor) do relatório, observando status, erros e análises."""
+        for campo, valor in pares:
+            if campo == 'analises' and isinstance(valor, Iterator):
+                valor = self._track_analises(valor)
+            elif campo == 'status':
+                self.succeeded = valor == 'sucesso'
+                self.failed = self.failed or not self.succeeded
+            elif campo in RESULT_ERROR_KEYS:
+                self.failed = True
+            yield campo, valor
+    
+    def _track_analises(self, pares):
+        for categoria, analise in pares:
+            self.categories += 1
+            if 'metricas' not in analise or RESULT_ERROR_KEYS & analise.keys():
+                self.failed = True
+            yield categoria, analise
+    
+    @property
+    def complete(self):
+        return self.succeeded and not self.failed and self.categories > 0
+
+def cache_result(key, serialized_result):
+    """Guarda um resultado serializado, descartando o menos usado se o cache estiver cheio."""
+    with result_cache_lock:
+        result_cache[key] = (time.monotonic(), serialized_result)
+        result_cache.move_to_end(key)
+        while len(result_cache) > RESULT_CACHE_MAX_SIZE:
+            result_cache.popitem(last=False)
+
+def stream_json_object(pares):
+    """Serializa pares (campo, valor) como um objeto JSON, um campo de cada vez.
+    
+    Valores que são iteradores de pares viram objetos aninhados, também em streaming.
+    """
+    from analisador_qualidade import to_json_bytes
+    
+    separador = b'{'
+    for campo, valor in pares:
+        yield separador + orjson.dumps(campo) + b':'
+        separador = b','
+        if isinstance(valor, Iterator):
+            yield from stream_json_object(valor)
+        else:
+            yield to_json_bytes(valor)
+    yield b'{}' if separador == b'{' else b'}'
+
+def ensure_eviction_worker():
+    """Inicia a thread de limpeza no processo atual (chamar com analyses_lock).
+    
+    Com o gunicorn em preload_app o módulo é importado antes do fork e threads
+    não sobrevivem a ele, por isso a thread é criada sob demanda em cada worker.
+    """
+    global eviction_thread
+    if eviction_thread is None or not eviction_thread.is_alive():
+        eviction_thread = threading.Thread(target=eviction_worker, name='limpeza-analises', daemon=True)
+        eviction_thread.start()
 
 @app.route('/')
 def index():
@@ -102,24 +580,53 @@ def start_analysis():
         if model not in ['gemini', 'gpt4-mini']:
             return jsonify({'erro': 'Modelo inválido. Use "gemini" ou "gpt4-mini"'}), 400
         
-        # Validar URL
-        if not repo_url.startswith(('http://', 'https://')):
-            return jsonify({'erro': 'URL inválida'}), 400
+        # Validar URL: só repositórios do GitHub podem ser baixados pelo analisador
+        if not GITHUB_REPO_URL_RE.fullmatch(repo_url):
+            return jsonify({'erro': 'URL inválida. Use https://github.com/<dono>/<repositorio>'}), 400
         
-        # Gerar ID único para a análise
-        analysis_id = f"analysis_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+        # Reaproveitar uma análise idêntica em andamento antes de consultar o commit
+        # (git ls-remote), para que pedidos repetidos voltem sem ida à rede
+        key = (repo_url, model)
+        existing_id = analyses_store.join(key)
         
-        # Criar status da análise
-        status = AnalysisStatus(analysis_id)
-        active_analyses[analysis_id] = status
+        if existing_id is None:
+            # Análises do mesmo commit são servidas do cache de resultados
+            from analisador_qualidade import resolve_commit_sha
+            commit_sha = resolve_commit_sha(repo_url)
+            cached_result = get_cached_result((repo_url, commit_sha, model)) if commit_sha else None
+            
+            # Gerar ID único para a análise
+            analysis_id = f"analysis_{secrets.token_hex(8)}"
+            
+            # Criar status da análise, descartando antes as que já expiraram
+            status = AnalysisStatus(analysis_id)
+            if cached_result is not None:
+                status.status = 'concluido'
+                status.progress = 100
+                status.message = 'Análise concluída!'
+                status.serialized_result = cached_result
+            
+            # Pedido igual que chegou durante a consulta do commit: start() o reaproveita
+            existing_id = analyses_store.start(status, None if cached_result is not None else key)
         
-        # Iniciar thread de análise
-        thread = threading.Thread(
-            target=run_analysis_worker,
-            args=(analysis_id, repo_url, api_key, model)
-        )
-        thread.daemon = True
-        thread.start()
+        if existing_id is not None:
+            logger.info(f"Análise {existing_id} já em andamento para {repo_url} usando {model}")
+            return jsonify({
+                'analysis_id': existing_id,
+                'status': 'iniciado',
+                'message': f'Análise já em andamento usando {model}'
+            })
+        
+        if cached_result is not None:
+            logger.info(f"Análise {analysis_id} servida do cache para {repo_url}@{commit_sha} usando {model}")
+            return jsonify({
+                'analysis_id': analysis_id,
+                'status': 'concluido',
+                'message': f'Análise recuperada do cache usando {model}'
+            })
+        
+        # Enfileirar a análise no pool de workers
+        EXECUTOR.submit(run_analysis_worker, status, repo_url, api_key, model, commit_sha)
         
         logger.info(f"Análise {analysis_id} iniciada para {repo_url} usando {model}")
         
@@ -137,10 +644,10 @@ def start_analysis():
 def get_analysis_status(analysis_id):
     """Obter o status de uma análise."""
     try:
-        if analysis_id not in active_analyses:
-            return jsonify({'erro': 'Análise não encontrada'}), 404
+        status = analyses_store.deliver(analysis_id)
         
-        status = active_analyses[analysis_id]
+        if status is None:
+            return jsonify({'erro': 'Análise não encontrada'}), 404
         
         response = {
             'analysis_id': analysis_id,
@@ -150,14 +657,12 @@ def get_analysis_status(analysis_id):
             'started_at': status.started_at.isoformat()
         }
         
-        if status.status == 'concluido' and status.result:
-            response['result'] = status.result
-            # Remover da memória após entregar o resultado
-            del active_analyses[analysis_id]
+        if status.status == 'concluido' and status.serialized_result:
+            # Anexar o resultado já serializado, sem percorrê-lo novamente
+            body = orjson.dumps(response)[:-1] + b',"result":' + status.serialized_result + b'}'
+            return Response(body, mimetype='application/json')
         elif status.status == 'erro':
             response['error'] = status.error
-            # Remover da memória após entregar o erro
-            del active_analyses[analysis_id]
         
         return jsonify(response)
         
@@ -182,20 +687,46 @@ def analyze_sync():
         if model not in ['gemini', 'gpt4-mini']:
             return jsonify({'erro': 'Modelo inválido. Use "gemini" ou "gpt4-mini"'}), 400
         
-        # Validar URL
-        if not repo_url.startswith(('http://', 'https://')):
-            return jsonify({'erro': 'URL inválida'}), 400
+        # Validar URL: só repositórios do GitHub podem ser baixados pelo analisador
+        if not GITHUB_REPO_URL_RE.fullmatch(repo_url):
+            return jsonify({'erro': 'URL inválida. Use https://github.com/<dono>/<repositorio>'}), 400
+        
+        # Análises do mesmo commit são servidas do cache de resultados
+        from analisador_qualidade import RepositoryAnalyzer, resolve_commit_sha
+        commit_sha = resolve_commit_sha(repo_url)
+        cache_key = (repo_url, commit_sha, model)
+        cached_result = get_cached_result(cache_key) if commit_sha else None
+        if cached_result is not None:
+            logger.info(f"Análise síncrona servida do cache para {repo_url}@{commit_sha} usando {model}")
+            return Response(cached_result, mimetype='application/json')
         
         logger.info(f"Iniciando análise síncrona para {repo_url} usando {model}")
         
         # Executar análise
         analyzer = RepositoryAnalyzer(api_key, model)
-        results = analyzer.run_analysis(repo_url)
-        processed_results = analyzer._make_json_serializable(results)
         
-        logger.info(f"Análise síncrona concluída para {repo_url} usando {model}")
+        def generate():
+            # Só um relatório que pode ir para o cache é guardado, e só até aparecer uma falha
+            chunks = [] if commit_sha else None
+            tracker = CompleteResultTracker()
+            
+            # Cada campo do relatório é enviado assim que fica pronto, sem montar o dict inteiro
+            try:
+                for chunk in stream_json_object(tracker.track(analyzer.iter_analysis(repo_url))):
+                    if chunks is not None:
+                        if tracker.failed:
+                            chunks = None
+                        else:
+                            chunks.append(chunk)
+                    yield chunk
+                if chunks is not None and tracker.complete:
+                    cache_result(cache_key, b''.join(chunks))
+                logger.info(f"Análise síncrona concluída para {repo_url} usando {model}")
+            except Exception as e:
+                # O status HTTP já foi enviado: a resposta termina incompleta
+                logger.error(f"Erro na análise síncrona: {str(e)}")
         
-        return jsonify(processed_results)
+        return Response(stream_with_context(generate()), mimetype='application/json')
         
     except Exception as e:
         logger.error(f"Erro na análise síncrona: {str(e)}")
@@ -207,7 +738,7 @@ def health_check():
     return jsonify({
         'status': 'ok',
         'timestamp': datetime.now().isoformat(),
-        'active_analyses': len(active_analyses)
+        'active_analyses': analyses_store.count()
     })
 
 @app.errorhandler(404)
@@ -221,40 +752,7 @@ def internal_error(error):
     logger.error(f"Erro interno: {str(error)}")
     return jsonify({'erro': 'Erro interno do servidor'}), 500
 
-# Limpeza periódica de análises antigas
-def cleanup_old_analyses():
-    """Remove análises antigas da memória."""
-    import threading
-    import time
-    
-    def cleanup_worker():
-        while True:
-            try:
-                current_time = datetime.now()
-                to_remove = []
-                
-                for analysis_id, status in active_analyses.items():
-                    # Remove análises com mais de 1 hora
-                    if (current_time - status.started_at).total_seconds() > 3600:
-                        to_remove.append(analysis_id)
-                
-                for analysis_id in to_remove:
-                    del active_analyses[analysis_id]
-                    logger.info(f"Análise antiga {analysis_id} removida da memória")
-                
-            except Exception as e:
-                logger.error(f"Erro na limpeza: {str(e)}")
-            
-            time.sleep(300)  # Verificar a cada 5 minutos
-    
-    cleanup_thread = threading.Thread(target=cleanup_worker)
-    cleanup_thread.daemon = True
-    cleanup_thread.start()
-
 if __name__ == '__main__':
-    # Iniciar limpeza automática
-    cleanup_old_analyses()
-    
     # Determinar se está em modo de desenvolvimento
     debug_mode = os.getenv('FLASK_ENV') == 'development'
     port = int(os.getenv('PORT', 5000))
@@ -263,9 +761,21 @@ if __name__ == '__main__':
     logger.info(f"Modo debug: {debug_mode}")
     logger.info(f"Frontend disponível em: http://localhost:{port}")
     
-    app.run(
-        host='0.0.0.0',
-        port=port,
-        debug=debug_mode,
-        threaded=True
-    )
+    if debug_mode:
+        # Servidor de desenvolvimento do Werkzeug, com reload automático
+        app.run(
+            host='0.0.0.0',
+            port=port,
+            debug=True,
+            threaded=True
+        )
+    else:
+        # Em produção o processo é substituído pelo gunicorn (ver gunicorn_conf.py);
+        # --chdir permite importar 'servidor:app' de qualquer diretório de trabalho
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        os.execvp(sys.executable, [
+            sys.executable, '-m', 'gunicorn',
+            '--chdir', base_dir,
+            '--config', os.path.join(base_dir, 'gunicorn_conf.py'),
+            'servidor:app'
+        ])